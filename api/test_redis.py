@@ -1,10 +1,14 @@
 import os
+import sys
 import json
 import asyncio
 import redis.asyncio as redis
 from http.server import BaseHTTPRequestHandler
 
-REDIS_URL = os.getenv("REDIS_URL")
+# Make the shared plant_bot package importable from api/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plant_bot.storage import REDIS_URL, connection_options
 
 
 async def test_redis_connection():
@@ -38,7 +42,8 @@ async def test_redis_connection():
     try:
         # Test 1: Create connection
         results["connection_test"] = "attempting"
-        client = redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+        # Same TLS settings as the bot, without its long-lived pool
+        client = redis.from_url(REDIS_URL, **connection_options(REDIS_URL))
         results["connection_test"] = "success"
 
         # Test 2: Ping
@@ -1,160 +1,406 @@
+from __future__ import annotations
+
 import os
+import sys
 import json
+import atexit
 import logging
+import contextvars
+import functools
+import hmac
 from datetime import datetime, timedelta
-from telegram import Update, Bot
-from telegram.ext import Application, CommandHandler, ContextTypes
+from typing import TYPE_CHECKING
 import asyncio
-import redis.asyncio as redis
 from http.server import BaseHTTPRequestHandler
 
+# python-telegram-bot is the bulk of a cold start, so it is only imported
+# once an update actually has to be processed; health checks and duplicate
+# updates never load it
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import ContextTypes
+
+# Make the shared plant_bot package importable from api/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plant_bot.storage import (
+    REMINDERS_KEY,
+    plant_key,
+    new_plant,
+    enqueue_update,
+    plant_expire_at,
+    STATUS_PAGE_SIZE,
+    STATUS_SNAPSHOT_MAX_TTL,
+)
+from plant_bot.backends import get_backend
+from plant_bot.cache import MISSING, VersionedCache
+from plant_bot.instrumentation import (
+    sample_payload,
+    span,
+    track_request,
+)
+from plant_bot.metrics import REGISTRY
+from plant_bot.status import (
+    STATUS_CALLBACK_PREFIX,
+    render_status,
+    status_keyboard,
+    parse_status_callback,
+)
+
 logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
 
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-REDIS_URL = os.getenv("REDIS_URL")
-
-# Log startup info
-logger.info(f"🚀 Bot starting up...")
-logger.info(f"📝 BOT_TOKEN exists: {bool(BOT_TOKEN)}")
-logger.info(f"📝 REDIS_URL exists: {bool(REDIS_URL)}")
+# Bot API endpoint; point it at a self-hosted Bot API server or a local stub
+TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
+# Answer with the reply as the webhook response instead of a sendMessage call
+WEBHOOK_REPLY_ENABLED = os.getenv("WEBHOOK_REPLY_ENABLED", "true") != "false"
+# How long an update_id is remembered to drop Telegram's retries of it
+DEDUP_TTL_SECONDS = int(os.getenv("DEDUP_TTL_SECONDS", "3600"))
+# Also count duplicate hits/misses in Redis (plant_bot:dedup_stats)
+DEDUP_STATS_ENABLED = os.getenv("DEDUP_STATS_ENABLED", "false") == "true"
+# "inline" processes updates in the request; "queue" hands them to the worker
+WEBHOOK_MODE = os.getenv("WEBHOOK_MODE", "inline")
+UPDATE_STREAM_MAXLEN = int(os.getenv("UPDATE_STREAM_MAXLEN", "100000"))
+# Bearer token required by GET /metrics; unset leaves it open
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# In-process cache of plants and the reminders flag (0 disables it)
+PLANT_CACHE_SIZE = int(os.getenv("PLANT_CACHE_SIZE", "0"))
+PLANT_CACHE_TTL = float(os.getenv("PLANT_CACHE_TTL", "30"))
+
+# Process-wide state, kept alive across warm invocations
+_loop = None
+_webhook_reply = contextvars.ContextVar("webhook_reply", default=None)
+
+
+def run_async(coro):
+    """Run a coroutine on the process-wide event loop"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+class DataManager:
+    """Bot data on the configured storage backend, with fallbacks and caching"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+        self.dedup_stats = {"hits": 0, "misses": 0}
+        self.cache = VersionedCache(PLANT_CACHE_SIZE, PLANT_CACHE_TTL)
+
+    def request_scope(self):
+        """Share one connection across all calls made in a request"""
+        return self.backend.request_scope()
+
+    async def prepare(self):
+        """Upgrade data written by older versions, once per process"""
+        try:
+            for upgraded, count in (await self.backend.prepare()).items():
+                if count:
+                    logger.info("🔁 Prepared storage: %s: %s", upgraded, count)
+        except Exception as e:
+            logger.error("Error preparing storage: %s", e)
 
-# Redis Keys
-CHAT_IDS_KEY = "plant_bot:chat_ids"
-REMINDERS_KEY = "plant_bot:reminders_enabled"
-PLANT_PREFIX = "plant_bot:user:"
+    async def claim_update(self, update_id):
+        """Return False if this update was already processed (a retry)"""
+        try:
+            first, version = await self.backend.claim_update(
+                update_id, DEDUP_TTL_SECONDS, DEDUP_STATS_ENABLED
+            )
+        except Exception as e:
+            # Fail open: processing twice beats dropping the update
+            logger.error("Error checking update %s: %s", update_id, e)
+            self.cache.invalidate()
+            return True
+        self.dedup_stats["misses" if first else "hits"] += 1
+        self.cache.sync(version)
+        return first
 
+    async def save_update_reply(self, update_id, reply):
+        """Keep the webhook reply for retries; False if one already arrived"""
+        try:
+            return await self.backend.save_update_reply(update_id, reply)
+        except Exception as e:
+            logger.error("Error saving reply to update %s: %s", update_id, e)
+            return True
 
-class RedisDataManager:
-    """Manages data in Redis"""
+    async def get_update_reply(self, update_id):
+        """The webhook reply a retried update was answered with, or None"""
+        try:
+            return await self.backend.get_update_reply(update_id)
+        except Exception as e:
+            logger.error("Error loading reply to update %s: %s", update_id, e)
+            return None
 
-    def __init__(self):
-        self.redis_url = REDIS_URL
+    def _cache_write(self, key, value, bumped=True):
+        """Write-through after our own write, which bumped the data version"""
+        if bumped:
+            self.cache.wrote()
+        self.cache.set(key, value)
 
-    async def _get_client(self):
-        """Get Redis client"""
-        return redis.from_url(self.redis_url, encoding="utf-8", decode_responses=True)
+    async def release_update(self, update_id):
+        """Let a retry of a failed update be processed again"""
+        try:
+            await self.backend.release_update(update_id)
+        except Exception as e:
+            logger.error("Error releasing update %s: %s", update_id, e)
 
     async def get_chat_ids(self):
         """Get all registered chat IDs"""
-        client = None
         try:
-            client = await self._get_client()
-            chat_ids = await client.get(CHAT_IDS_KEY)
-            return json.loads(chat_ids) if chat_ids else []
+            chat_ids = []
+            async for batch in self.backend.iter_chat_batches():
+                chat_ids.extend(batch)
+            return chat_ids
         except Exception as e:
-            logger.error(f"Error getting chat IDs: {e}")
+            logger.error("Error getting chat IDs: %s", e)
             return []
-        finally:
-            if client:
-                await client.close()
+
+    async def is_chat_registered(self, chat_id):
+        """Check if a chat ID is registered"""
+        try:
+            return await self.backend.is_chat_registered(chat_id)
+        except Exception as e:
+            logger.error("Error checking chat ID: %s", e)
+            return False
 
     async def add_chat_id(self, chat_id):
-        """Add a chat ID to the list"""
-        client = None
+        """Add a chat ID to the set"""
         try:
-            client = await self._get_client()
-            chat_ids = await self.get_chat_ids()
-            if chat_id not in chat_ids:
-                chat_ids.append(chat_id)
-                await client.set(CHAT_IDS_KEY, json.dumps(chat_ids))
+            await self.backend.add_chat(chat_id)
             return True
         except Exception as e:
-            logger.error(f"Error adding chat ID: {e}")
+            logger.error("Error adding chat ID: %s", e)
             return False
-        finally:
-            if client:
-                await client.close()
 
     async def get_reminders_enabled(self):
         """Check if reminders are enabled"""
-        client = None
+        if self.cache.enabled:
+            enabled = self.cache.get(REMINDERS_KEY)
+            if enabled is not MISSING:
+                return enabled
         try:
-            client = await self._get_client()
-            enabled = await client.get(REMINDERS_KEY)
-            return enabled != "false" if enabled else True
+            enabled = await self.backend.get_reminders_enabled()
+            self.cache.set(REMINDERS_KEY, enabled)
+            return enabled
         except Exception as e:
-            logger.error(f"Error getting reminders status: {e}")
+            logger.error("Error getting reminders status: %s", e)
             return True
-        finally:
-            if client:
-                await client.close()
 
     async def set_reminders_enabled(self, enabled):
         """Enable/disable reminders"""
-        client = None
         try:
-            client = await self._get_client()
-            await client.set(REMINDERS_KEY, "true" if enabled else "false")
+            await self.backend.set_reminders_enabled(enabled)
+            self._cache_write(REMINDERS_KEY, enabled)
             return True
         except Exception as e:
-            logger.error(f"Error setting reminders: {e}")
+            logger.error("Error setting reminders: %s", e)
+            self.cache.invalidate()
             return False
-        finally:
-            if client:
-                await client.close()
 
     async def get_plant(self, user_id):
         """Get plant data for a user"""
-        client = None
+        key = plant_key(user_id)
+        if self.cache.enabled:
+            plant = self.cache.get(key)
+            if plant is not MISSING:
+                return plant
         try:
-            client = await self._get_client()
-            key = f"{PLANT_PREFIX}{user_id}"
-            plant_data = await client.get(key)
-            return json.loads(plant_data) if plant_data else None
+            plant = await self.backend.get_plant(user_id)
+            self.cache.set(key, plant)
+            return plant
         except Exception as e:
-            logger.error(f"Error getting plant for {user_id}: {e}")
+            logger.error("Error getting plant for %s: %s", user_id, e)
             return None
-        finally:
-            if client:
-                await client.close()
 
     async def save_plant(self, user_id, plant_data):
-        """Save plant data for a user"""
-        client = None
+        """Save plant data for a user, updating its due index and reminder"""
         try:
-            client = await self._get_client()
-            key = f"{PLANT_PREFIX}{user_id}"
-            await client.set(key, json.dumps(plant_data))
+            await self.backend.save_plants({user_id: plant_data})
+            self._cache_write(plant_key(user_id), plant_data)
             return True
         except Exception as e:
-            logger.error(f"Error saving plant for {user_id}: {e}")
+            logger.error("Error saving plant for %s: %s", user_id, e)
+            self.cache.invalidate()
             return False
-        finally:
-            if client:
-                await client.close()
+
+    async def ensure_plant(self, user_id, username, chat_id=None):
+        """Get a user's plant, creating it if missing; returns (plant, created)"""
+        try:
+            plant, created = await self.backend.ensure_plant(user_id, username, chat_id)
+            # Only creating the plant bumps the data version
+            self._cache_write(plant_key(user_id), plant, bumped=created)
+            return plant, created
+        except Exception as e:
+            logger.error("Error ensuring plant for %s: %s", user_id, e)
+            self.cache.invalidate()
+            return None, False
+
+    async def mark_watered(self, user_id, username, chat_id=None):
+        """Atomically record a watering; returns the updated plant"""
+        try:
+            plant = await self.backend.mark_watered(user_id, username, chat_id)
+            self._cache_write(plant_key(user_id), plant)
+            return plant
+        except Exception as e:
+            logger.error("Error watering plant for %s: %s", user_id, e)
+            self.cache.invalidate()
+            return None
+
+    async def rename_plant(self, user_id, username, plant_name, chat_id=None):
+        """Atomically rename a user's plant; returns the updated plant"""
+        try:
+            plant = await self.backend.rename_plant(
+                user_id, username, plant_name, chat_id
+            )
+            self._cache_write(plant_key(user_id), plant)
+            return plant
+        except Exception as e:
+            logger.error("Error renaming plant for %s: %s", user_id, e)
+            self.cache.invalidate()
+            return None
+
+    async def iter_plants(self):
+        """Stream (user_id, plant) pairs"""
+        async for user_id, plant in self.backend.iter_plants():
+            yield user_id, plant
 
     async def get_all_plants(self):
         """Get all plants (for status command)"""
-        client = None
         try:
-            client = await self._get_client()
-            keys = await client.keys(f"{PLANT_PREFIX}*")
             plants = {}
-
-            for key in keys:
-                plant_data = await client.get(key)
-                if plant_data:
-                    user_id = key.replace(PLANT_PREFIX, "")
-                    plants[user_id] = json.loads(plant_data)
-
+            async for user_id, plant in self.iter_plants():
+                plants[user_id] = plant
             return plants
         except Exception as e:
-            logger.error(f"Error getting all plants: {e}")
+            logger.error("Error getting all plants: %s", e)
             return {}
-        finally:
-            if client:
-                await client.close()
+
+    async def get_status_page(self, offset=0):
+        """Rendered /status page, from its snapshot unless a write changed it
+
+        Returns (text, offset, total); offset moves back to the last page if
+        plants were deleted since the page button was sent.
+        """
+        backend = self.backend
+        try:
+            snapshot, version = await backend.get_status_snapshot(offset)
+            if snapshot is not None:
+                return snapshot["text"], offset, snapshot["total"]
+
+            plants, total = await backend.get_status_page(offset, STATUS_PAGE_SIZE)
+            if not plants and 0 < offset and total:
+                offset = (total - 1) // STATUS_PAGE_SIZE * STATUS_PAGE_SIZE
+                plants, total = await backend.get_status_page(offset, STATUS_PAGE_SIZE)
+        except Exception as e:
+            logger.error("Error getting status page %s: %s", offset, e)
+            return render_status({})[0], 0, 0
+
+        now = datetime.now()
+        with span("status_render"):
+            text, stale_at = render_status(plants, offset, total, now)
+        if version is None:
+            # This backend keeps no snapshots
+            return text, offset, total
+
+        # Expiring plants drop off the page without bumping the version
+        expiries = [plant_expire_at(plant) for plant in plants.values()]
+        expires_at = min(filter(None, expiries), default=None)
+        if expires_at is not None:
+            expires_at = datetime.fromtimestamp(expires_at)
+            stale_at = min(stale_at, expires_at) if stale_at else expires_at
+        ttl = stale_at - now if stale_at else STATUS_SNAPSHOT_MAX_TTL
+        try:
+            await backend.store_status_snapshot(
+                offset, version, {"text": text, "total": total}, ttl
+            )
+        except Exception as e:
+            logger.error("Error storing status snapshot: %s", e)
+        return text, offset, total
+
+
+# Name used before storage backends; kept for existing imports
+RedisDataManager = DataManager
+
+
+class WebhookReply:
+    """The one reply of an update that can ride on the webhook response
+
+    Telegram executes a Bot API method returned as the webhook response
+    body, which saves a separate sendMessage request. Only the first reply
+    is held; a second one flushes it first so the order stays intact.
+    """
+
+    def __init__(self):
+        self.payload = None
+        self.closed = False
+
+    def response(self):
+        """The held call as a JSON-serializable webhook response body"""
+        if self.payload is None or "reply_markup" not in self.payload:
+            return self.payload
+        return {**self.payload, "reply_markup": self.payload["reply_markup"].to_dict()}
+
+    async def send(self, bot):
+        """Send the held call as a regular Bot API request instead"""
+        held = dict(self.payload)
+        method = held.pop("method")
+        if method == "sendMessage":
+            await bot.send_message(**held)
+        else:
+            await bot.answer_callback_query(**held)
 
 
 class PlantBotHandlers:
     def __init__(self, dm):
         self.dm = dm
 
+    async def reply(self, update: Update, text, reply_markup=None):
+        """Reply to the update's message, via the webhook response if possible"""
+        slot = _webhook_reply.get()
+        if slot is not None and not slot.closed:
+            if slot.payload is None:
+                message = update.effective_message
+                slot.payload = {
+                    "method": "sendMessage",
+                    "chat_id": message.chat_id,
+                    "text": text,
+                }
+                if reply_markup is not None:
+                    slot.payload["reply_markup"] = reply_markup
+                # reply_text quotes the command outside private chats
+                if message.chat.type != "private":
+                    slot.payload["reply_to_message_id"] = message.message_id
+                return
+
+            held = slot.payload
+            slot.payload = None
+            slot.closed = True
+            del held["method"]
+            await update.get_bot().send_message(**held)
+
+        await update.message.reply_text(text, reply_markup=reply_markup)
+
+    async def answer(self, update: Update):
+        """Acknowledge a button press, via the webhook response if possible"""
+        slot = _webhook_reply.get()
+        if slot is not None and not slot.closed and slot.payload is None:
+            slot.payload = {
+                "method": "answerCallbackQuery",
+                "callback_query_id": update.callback_query.id,
+            }
+            # Anything sent after this goes out directly
+            slot.closed = True
+            return
+        await update.callback_query.answer()
+
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        logger.info("🌱 START command handler called!")
+        logger.debug("🌱 START command handler called!")
 
         chat_id = update.effective_chat.id
         user_id = update.effective_user.id
@@ -164,28 +410,22 @@ class PlantBotHandlers:
             or "Unknown"
         )
 
-        logger.info(f"👤 User: {username} (ID: {user_id})")
-        logger.info(f"💬 Chat ID: {chat_id}")
+        logger.debug("👤 User: %s (ID: %s)", username, user_id)
+        logger.debug("💬 Chat ID: %s", chat_id)
 
         # Register chat
         await self.dm.add_chat_id(chat_id)
-        logger.info(f"✅ Chat ID registered")
+        logger.debug("✅ Chat ID registered")
 
-        # Check if user already has a plant
-        plant = await self.dm.get_plant(user_id)
+        # Get the user's plant, creating it in the same call if missing
+        plant, created = await self.dm.ensure_plant(user_id, username, chat_id)
 
-        if not plant:
-            logger.info(f"🆕 Creating new plant for user")
-            plant = {
-                "username": username,
-                "plant_name": f"{username}'s Plant",
-                "last_watered": None,
-                "watered_by": None,
-                "created_at": datetime.now().isoformat(),
-            }
-            await self.dm.save_plant(user_id, plant)
+        if created:
+            logger.debug("🆕 Created new plant for user")
+        elif plant:
+            logger.debug("🌱 User already has plant: %s", plant["plant_name"])
         else:
-            logger.info(f"🌱 User already has plant: {plant['plant_name']}")
+            plant = new_plant(username)
 
         msg = f"""
 🌱 Welcome {username}! Plant Bot activated! 🌱
@@ -203,12 +443,12 @@ Track your plants! 🌿
 Note: Data older than 7 days is automatically cleaned up.
         """
 
-        logger.info(f"📤 Sending reply message...")
-        await update.message.reply_text(msg)
-        logger.info(f"✅ Reply sent successfully!")
+        logger.debug("📤 Sending reply message...")
+        await self.reply(update, msg)
+        logger.debug("✅ Reply sent successfully!")
 
     async def watered(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        logger.info("💧 WATERED command handler called!")
+        logger.debug("💧 WATERED command handler called!")
 
         user_id = update.effective_user.id
         username = (
@@ -217,49 +457,35 @@ Note: Data older than 7 days is automatically cleaned up.
             or "Someone"
         )
 
-        plant = await self.dm.get_plant(user_id)
-
-        if not plant:
-            plant = {
-                "username": username,
-                "plant_name": f"{username}'s Plant",
-                "last_watered": None,
-                "watered_by": None,
-                "created_at": datetime.now().isoformat(),
-            }
-
-        plant["last_watered"] = datetime.now().isoformat()
-        plant["watered_by"] = username
-        plant["username"] = username
-
-        await self.dm.save_plant(user_id, plant)
+        chat_id = update.effective_chat.id
+        plant = await self.dm.mark_watered(user_id, username, chat_id) or new_plant(
+            username
+        )
 
         msg = f"✅ {username} watered {plant['plant_name']}! 🌱\n"
         msg += f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
         msg += "🗓️ Next watering: 3 days"
 
-        await update.message.reply_text(msg)
-        logger.info(f"✅ Watered reply sent!")
+        await self.reply(update, msg)
+        logger.debug("✅ Watered reply sent!")
 
     async def my_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        logger.info("📊 MYSTATUS command handler called!")
+        logger.debug("📊 MYSTATUS command handler called!")
 
         user_id = update.effective_user.id
         plant = await self.dm.get_plant(user_id)
 
         if not plant:
-            await update.message.reply_text(
-                "🌱 You haven't registered yet! Use /start first."
-            )
+            await self.reply(update, "🌱 You haven't registered yet! Use /start first.")
             return
 
         if not plant["last_watered"]:
-            await update.message.reply_text(
-                f"🌱 {plant['plant_name']} has never been watered yet!"
+            await self.reply(
+                update, f"🌱 {plant['plant_name']} has never been watered yet!"
             )
             return
 
-        last_watered = datetime.fromisoformat(plant["last_watered"])
+        last_watered = datetime.fromtimestamp(plant["last_watered"])
         days_since = (datetime.now() - last_watered).days
         next_watering = last_watered + timedelta(days=3)
 
@@ -275,47 +501,37 @@ Note: Data older than 7 days is automatically cleaned up.
             days_left = 3 - days_since
             msg += f"✅ Good for {days_left} more day(s)"
 
-        await update.message.reply_text(msg)
+        await self.reply(update, msg)
 
     async def status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        logger.info("📋 STATUS command handler called!")
-
-        plants = await self.dm.get_all_plants()
-
-        if not plants:
-            await update.message.reply_text(
-                "🌱 No plants registered yet! Everyone should use /start first."
-            )
-            return
-
-        msg = "🌿 All Plants Status:\n\n"
-
-        for user_id, plant in plants.items():
-            plant_name = plant["plant_name"]
-            username = plant["username"]
-
-            msg += f"🌱 {plant_name} ({username})\n"
+        logger.debug("📋 STATUS command handler called!")
 
-            if not plant["last_watered"]:
-                msg += "   ❌ Never watered\n\n"
-                continue
+        text, offset, total = await self.dm.get_status_page()
+        await self.reply(update, text, status_keyboard(offset, total, STATUS_PAGE_SIZE))
 
-            last_watered = datetime.fromisoformat(plant["last_watered"])
-            days_since = (datetime.now() - last_watered).days
+    async def status_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        from telegram.error import BadRequest
 
-            msg += f"   💧 Last: {last_watered.strftime('%m-%d %H:%M')}\n"
-            msg += f"   ⏰ {days_since} days ago\n"
+        logger.debug("📋 STATUS page button pressed!")
 
-            if days_since >= 3:
-                msg += "   ⚠️ Needs water!\n\n"
-            else:
-                days_left = 3 - days_since
-                msg += f"   ✅ Good for {days_left} day(s)\n\n"
+        query = update.callback_query
+        await self.answer(update)
+        offset = parse_status_callback(query.data)
+        if offset is None:
+            return
 
-        await update.message.reply_text(msg)
+        text, offset, total = await self.dm.get_status_page(offset)
+        try:
+            await query.edit_message_text(
+                text, reply_markup=status_keyboard(offset, total, STATUS_PAGE_SIZE)
+            )
+        except BadRequest as e:
+            # Pressing a button again while nothing changed
+            if "not modified" not in str(e):
+                raise
 
     async def set_plant_name(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        logger.info("✏️ SETPLANT command handler called!")
+        logger.debug("✏️ SETPLANT command handler called!")
 
         user_id = update.effective_user.id
         username = (
@@ -324,31 +540,23 @@ Note: Data older than 7 days is automatically cleaned up.
             or "Unknown"
         )
 
-        plant = await self.dm.get_plant(user_id)
-
-        if not plant:
-            plant = {
-                "username": username,
-                "plant_name": f"{username}'s Plant",
-                "last_watered": None,
-                "watered_by": None,
-                "created_at": datetime.now().isoformat(),
-            }
-
         if context.args:
             new_name = " ".join(context.args)
-            plant["plant_name"] = new_name
-            await self.dm.save_plant(user_id, plant)
-            await update.message.reply_text(f"🌱 Your plant is now named: {new_name}")
+            await self.dm.rename_plant(
+                user_id, username, new_name, update.effective_chat.id
+            )
+            await self.reply(update, f"🌱 Your plant is now named: {new_name}")
         else:
+            plant = await self.dm.get_plant(user_id) or new_plant(username)
             current_name = plant["plant_name"]
-            await update.message.reply_text(
+            await self.reply(
+                update,
                 f"🌱 Current plant name: {current_name}\n\n"
-                f"To change it, use: /setplant New Plant Name"
+                f"To change it, use: /setplant New Plant Name",
             )
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        logger.info("❓ HELP command handler called!")
+        logger.debug("❓ HELP command handler called!")
 
         help_text = """
 🌱 **Plant Bot Commands:**
@@ -370,74 +578,262 @@ Note: Data older than 7 days is automatically cleaned up.
 Each person tracks their own plant! 🌿
 Data older than 7 days is automatically cleaned up.
         """
-        await update.message.reply_text(help_text)
+        await self.reply(update, help_text)
 
     async def enable_reminders(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ):
-        logger.info("🔔 ENABLE command handler called!")
+        logger.debug("🔔 ENABLE command handler called!")
         await self.dm.set_reminders_enabled(True)
-        await update.message.reply_text("✅ Watering reminders enabled for everyone!")
+        await self.reply(update, "✅ Watering reminders enabled for everyone!")
 
     async def disable_reminders(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ):
-        logger.info("🔕 DISABLE command handler called!")
+        logger.debug("🔕 DISABLE command handler called!")
         await self.dm.set_reminders_enabled(False)
-        await update.message.reply_text("❌ Watering reminders disabled!")
+        await self.reply(update, "❌ Watering reminders disabled!")
+
+
+data_manager = DataManager()
+
+# Command name -> PlantBotHandlers method
+COMMAND_HANDLERS = [
+    ("start", "start"),
+    ("watered", "watered"),
+    ("status", "status"),
+    ("mystatus", "my_status"),
+    ("setplant", "set_plant_name"),
+    ("help", "help_command"),
+    ("enable", "enable_reminders"),
+    ("disable", "disable_reminders"),
+]
+
+# Inline button callback data pattern -> PlantBotHandlers method
+CALLBACK_HANDLERS = [
+    (f"^{STATUS_CALLBACK_PREFIX}", "status_page"),
+]
+
+_application = None
+_application_loop = None
+_application_lock = asyncio.Lock()
+
+
+def instrumented(name, callback):
+    """Run a handler callback inside a span named after it"""
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        with span(f"handler {name}"):
+            return await callback(update, context)
+
+    return wrapper
+
+
+def register_handlers(app, handlers):
+    """Register every command and button callback on the application"""
+    from telegram.ext import CallbackQueryHandler, CommandHandler
+
+    for command, method in COMMAND_HANDLERS:
+        callback = instrumented(method, getattr(handlers, method))
+        app.add_handler(CommandHandler(command, callback))
+    for pattern, method in CALLBACK_HANDLERS:
+        callback = instrumented(method, getattr(handlers, method))
+        app.add_handler(CallbackQueryHandler(callback, pattern))
+
+
+async def get_application():
+    """Get the bot application, building and initializing it once per process"""
+    global _application, _application_loop
+    loop = asyncio.get_running_loop()
+    async with _application_lock:
+        if _application is None or _application_loop is not loop:
+            from telegram.ext import Application
+            from plant_bot.telegram_request import InstrumentedRequest
+
+            logger.info("🔧 Building application...")
+            logger.info("📝 BOT_TOKEN exists: %s", bool(BOT_TOKEN))
+            logger.info("📝 Storage backend: %s", data_manager.backend.name)
+            # Webhook mode never polls, so skip building an Updater
+            with span("app_build"):
+                # Same pool size as the default request; records Bot API calls
+                request = InstrumentedRequest(connection_pool_size=256)
+                app = (
+                    Application.builder()
+                    .token(BOT_TOKEN)
+                    .base_url(TELEGRAM_BASE_URL)
+                    .request(request)
+                    .updater(None)
+                    .build()
+                )
+                register_handlers(app, PlantBotHandlers(data_manager))
+                # e.g. plants saved before the due index existed
+                await data_manager.prepare()
+
+                logger.info("🚀 Initializing application...")
+                await app.initialize()
+            _application = app
+            _application_loop = loop
+    return _application
+
+
+async def close_resources():
+    """Shut down the cached application and Redis pool"""
+    global _application
+    if _application is not None:
+        logger.info("🛑 Shutting down application...")
+        await _application.shutdown()
+        _application = None
+    await data_manager.backend.close()
 
 
-async def process_update(update_data):
-    """Process incoming webhook update"""
+def shutdown():
+    """Close resources held on the process event loop at process exit"""
+    if _loop is None or _loop.is_closed():
+        return
     try:
-        logger.info("=" * 50)
-        logger.info(f"📨 FULL UPDATE DATA:")
-        logger.info(json.dumps(update_data, indent=2))
-        logger.info("=" * 50)
-
-        # Check if it's a message
-        if "message" in update_data:
-            message = update_data["message"]
-            logger.info(f"📝 Message text: {message.get('text', 'NO TEXT')}")
+        _loop.run_until_complete(close_resources())
+    except Exception as e:
+        logger.error("Error during shutdown: %s", e)
+    finally:
+        _loop.close()
+
+
+atexit.register(shutdown)
+
+
+def update_type(update_data):
+    """Kind of update, e.g. message or callback_query"""
+    return next((field for field in update_data if field != "update_id"), "unknown")
+
+
+async def process_update(update_data, webhook_reply=WEBHOOK_REPLY_ENABLED):
+    """Process incoming webhook update
+
+    Returns a Bot API call to send back as the webhook response, or None.
+    Logs one summary line per update; set LOG_PAYLOAD_SAMPLE_RATE to also
+    log a fraction of full payloads.
+    """
+    update_id = update_data.get("update_id")
+    if sample_payload():
+        logger.info("📨 Update payload: %s", json.dumps(update_data))
+
+    outcome = "error"
+    slot = None
+    with track_request() as stats:
+        try:
+            async with data_manager.request_scope():
+                # Telegram retries slow updates; drop them before doing any work
+                if update_id is not None and not await data_manager.claim_update(
+                    update_id
+                ):
+                    outcome = "duplicate"
+                    # The first response may never have reached Telegram
+                    if webhook_reply:
+                        return await data_manager.get_update_reply(update_id)
+                    return None
+
+                slot = WebhookReply() if webhook_reply else None
+                token = _webhook_reply.set(slot)
+                try:
+                    from telegram import Update
+
+                    app = await get_application()
+                    await app.process_update(Update.de_json(update_data, app.bot))
+                except Exception:
+                    if update_id is not None:
+                        await data_manager.release_update(update_id)
+                    raise
+                finally:
+                    _webhook_reply.reset(token)
+
+                response = slot.response() if slot else None
+                if response is not None and update_id is not None:
+                    if not await data_manager.save_update_reply(update_id, response):
+                        # Telegram retried meanwhile and drops this response
+                        try:
+                            await slot.send(app.bot)
+                        except Exception as e:
+                            logger.error(
+                                "Error sending reply to update %s: %s", update_id, e
+                            )
+                        response = None
+
+            outcome = "ok"
+            return response
+
+        except Exception:
+            logger.error("❌ Error processing update %s", update_id, exc_info=True)
+            raise
+
+        finally:
+            stats.finish(outcome, update_type(update_data))
             logger.info(
-                f"👤 From user: {message.get('from', {}).get('first_name', 'UNKNOWN')}"
+                "📨 update=%s type=%s outcome=%s ms=%.1f redis=%d redis_ms=%.1f "
+                "redis_bytes=%d telegram=%d telegram_ms=%.1f webhook_reply=%s",
+                update_id,
+                update_type(update_data),
+                outcome,
+                stats.elapsed_ms,
+                stats.redis_calls,
+                stats.redis_ms,
+                stats.redis_bytes,
+                stats.telegram_calls,
+                stats.telegram_ms,
+                slot is not None and slot.payload is not None,
             )
-            logger.info(f"💬 Chat ID: {message.get('chat', {}).get('id', 'UNKNOWN')}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "⏱️ Spans: %s",
+                    ", ".join(f"{name}={ms:.1f}ms" for name, ms in stats.spans),
+                )
+            if outcome == "duplicate":
+                logger.debug(
+                    "♻️ Duplicates: %(hits)d hits / %(misses)d misses",
+                    data_manager.dedup_stats,
+                )
+            if data_manager.cache.enabled and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "🗃️ Cache: %(hits)d hits / %(misses)d misses, %(size)d entries",
+                    data_manager.cache.stats(),
+                )
+
+
+async def queue_update(update_data):
+    """Validate an update and append it to the worker stream"""
+    if not isinstance(update_data, dict) or not isinstance(
+        update_data.get("update_id"), int
+    ):
+        raise ValueError("Not a Telegram update")
 
-        dm = RedisDataManager()
-        handlers = PlantBotHandlers(dm)
+    async with data_manager.request_scope() as client:
+        if client is None:
+            raise RuntimeError(
+                f"WEBHOOK_MODE=queue needs Redis, not {data_manager.backend.name}"
+            )
+        entry_id = await enqueue_update(client, update_data, UPDATE_STREAM_MAXLEN)
+    logger.info("📥 Queued update %s as %s", update_data["update_id"], entry_id)
 
-        logger.info("🔧 Building application...")
-        app = Application.builder().token(BOT_TOKEN).build()
 
-        # Add command handlers
-        logger.info("➕ Adding command handlers...")
-        app.add_handler(CommandHandler("start", handlers.start))
-        app.add_handler(CommandHandler("watered", handlers.watered))
-        app.add_handler(CommandHandler("status", handlers.status))
-        app.add_handler(CommandHandler("mystatus", handlers.my_status))
-        app.add_handler(CommandHandler("setplant", handlers.set_plant_name))
-        app.add_handler(CommandHandler("help", handlers.help_command))
-        app.add_handler(CommandHandler("enable", handlers.enable_reminders))
-        app.add_handler(CommandHandler("disable", handlers.disable_reminders))
+async def handle_webhook(update_data):
+    """Handle a webhook update according to WEBHOOK_MODE
 
-        logger.info("🚀 Initializing application...")
-        await app.initialize()
+    Returns a Bot API call to send back as the webhook response, or None.
+    """
+    if WEBHOOK_MODE == "queue":
+        await queue_update(update_data)
+        return None
+    return await process_update(update_data)
 
-        logger.info("⚙️ Processing update...")
-        await app.process_update(Update.de_json(update_data, app.bot))
 
-        logger.info("🛑 Shutting down application...")
-        await app.shutdown()
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
 
-        logger.info("✅ Update processed successfully!")
-        logger.info("=" * 50)
 
-    except Exception as e:
-        logger.error("=" * 50)
-        logger.error(f"❌ ERROR in handle_update: {e}", exc_info=True)
-        logger.error("=" * 50)
-        raise
+def metrics_authorized(authorization):
+    """Whether a request may read /metrics, given its Authorization header"""
+    if METRICS_TOKEN is None:
+        return True
+    return hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}")
 
 
 class handler(BaseHTTPRequestHandler):
@@ -447,21 +843,21 @@ class handler(BaseHTTPRequestHandler):
             content_length = int(self.headers.get("Content-Length", 0))
             post_data = self.rfile.read(content_length)
             update_data = json.loads(post_data.decode("utf-8"))
-            logger.info("🌐 POST request received")
+            logger.debug("🌐 POST request received")
 
             # Process the update
-            asyncio.run(process_update(update_data))
-            # Send success response
+            reply = run_async(handle_webhook(update_data))
+            # Send success response, carrying the reply if there is one
             self.send_response(200)
             self.send_header("Content-Type", "application/json")
             self.end_headers()
-            response = json.dumps({"ok": True})
+            response = json.dumps(reply or {"ok": True})
             self.wfile.write(response.encode("utf-8"))
 
-            logger.info("✅ Response sent to Telegram")
+            logger.debug("✅ Response sent to Telegram")
 
         except Exception as e:
-            logger.error(f"❌ Error in POST handler: {e}", exc_info=True)
+            logger.error("❌ Error in POST handler: %s", e, exc_info=True)
             self.send_response(500)
             self.send_header("Content-Type", "application/json")
             self.end_headers()
@@ -470,9 +866,23 @@ class handler(BaseHTTPRequestHandler):
             self.wfile.write(response.encode("utf-8"))
 
     def do_GET(self):
-        """Handle GET requests - health check"""
-        logger.info("🌐 GET request received")
+        """Handle GET requests - health check, or metrics on /metrics"""
+        logger.debug("🌐 GET request received")
+        if self.path.split("?", 1)[0].rstrip("/").endswith("/metrics"):
+            self.send_metrics()
+            return
         self.send_response(200)
         self.send_header("Content-Type", "text/plain; charset=utf-8")
         self.end_headers()
         self.wfile.write("🌱 Plant Bot is running!".encode("utf-8"))
+
+    def send_metrics(self):
+        """Prometheus metrics of this instance"""
+        if not metrics_authorized(self.headers.get("Authorization")):
+            self.send_response(401)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+        self.end_headers()
+        self.wfile.write(REGISTRY.render().encode("utf-8"))
@@ -0,0 +1 @@
+"""Local benchmarks against fake Redis and a Telegram API stub"""
@@ -0,0 +1,92 @@
+"""Synthetic plant data seeded straight into storage"""
+
+import json
+import random
+from datetime import datetime, timedelta
+
+from plant_bot.storage import (
+    CHAT_IDS_KEY,
+    DUE_INDEX_KEY,
+    REMINDER_QUEUE_KEY,
+    due_score,
+    encode_plant,
+    plant_key,
+    reminder_time,
+)
+
+# One group chat per this many users
+USERS_PER_CHAT = 20
+SEED_BATCH_SIZE = 1000
+
+
+def chat_count(size):
+    return max(1, size // USERS_PER_CHAT)
+
+
+def synthetic_plant(user_id, size, now, rng):
+    """A plant record shaped like the ones the bot writes
+
+    Watering times spread over the last 10 days, so roughly 70% are due;
+    one plant in ten was never watered. Data older than 7 days is what the
+    cleanup script removes.
+    """
+    created_at = now - timedelta(days=rng.uniform(0, 14))
+    last_watered = None
+    if rng.random() >= 0.1:
+        last_watered = int((now - timedelta(days=rng.uniform(0, 10))).timestamp())
+    return {
+        "username": f"user{user_id}",
+        "plant_name": f"Plant {user_id}",
+        "last_watered": last_watered,
+        "watered_by": f"user{user_id}" if last_watered else None,
+        "created_at": int(created_at.timestamp()),
+        "chat_id": str(-1000 - user_id % chat_count(size)),
+    }
+
+
+def legacy_record(plant):
+    """The JSON record with ISO times that the bot wrote before format v2"""
+    iso = {}
+    for field in ("last_watered", "created_at"):
+        if plant[field] is not None:
+            iso[field] = datetime.fromtimestamp(plant[field]).isoformat()
+    return json.dumps({**plant, **iso})
+
+
+async def seed(client, size, seed=42, now=None, legacy=False):
+    """Write size plants with their index entries and chats; returns user IDs
+
+    legacy writes JSON records instead of the compact format.
+    """
+    encode = legacy_record if legacy else encode_plant
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    user_ids = list(range(1, size + 1))
+    for start in range(0, size, SEED_BATCH_SIZE):
+        async with client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids[start : start + SEED_BATCH_SIZE]:
+                plant = synthetic_plant(user_id, size, now, rng)
+                pipe.set(plant_key(user_id), encode(plant))
+                pipe.zadd(DUE_INDEX_KEY, {str(user_id): due_score(plant)})
+                pipe.zadd(REMINDER_QUEUE_KEY, {str(user_id): reminder_time(plant)})
+            await pipe.execute()
+    chats = [-1000 - i for i in range(chat_count(size))]
+    await client.sadd(CHAT_IDS_KEY, *chats)
+    return user_ids
+
+
+async def seed_backend(backend, size, seed=42, now=None):
+    """seed() for a backend without direct Redis access; returns user IDs"""
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    user_ids = list(range(1, size + 1))
+    for start in range(0, size, SEED_BATCH_SIZE):
+        await backend.save_plants(
+            {
+                str(user_id): synthetic_plant(user_id, size, now, rng)
+                for user_id in user_ids[start : start + SEED_BATCH_SIZE]
+            }
+        )
+    for chat_id in range(chat_count(size)):
+        await backend.add_chat(-1000 - chat_id)
+    return user_ids
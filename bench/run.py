@@ -0,0 +1,475 @@
+"""Benchmark process_update and the maintenance scripts locally
+
+Runs every command against synthetic datasets, with Redis served by
+fakeredis (or a local redis-server via --redis-url, or --backend sqlite for
+a temporary SQLite file) and the Bot API by bench.telegram_stub, then
+writes the results as JSON:
+
+    python -m bench.run --sizes 10,1000,10000 --compare bench/results/old.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+BENCH_TOKEN = "123456:bench"
+BENCH_USER_ID = 10_000_000
+DEFAULT_SIZES = "10,1000,10000"
+DEFAULT_ITERATIONS = 200
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def configure_environment(port, redis_url):
+    """Point the bot at the stub; must run before any bot module is imported"""
+    os.environ.update(
+        {
+            "TELEGRAM_BOT_TOKEN": BENCH_TOKEN,
+            "TELEGRAM_BASE_URL": f"http://127.0.0.1:{port}/bot",
+            "BROADCAST_RATE": "100000",
+            "BROADCAST_PER_CHAT_INTERVAL": "0",
+            "CLEANUP_MAX_OPS_PER_SECOND": "0",
+            "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+            "REDIS_URL": redis_url or "redis://fakeredis",
+        }
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def message_update(update_id, user_id, chat_id, text):
+    update = {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "group", "title": "Bench"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+            "text": text,
+        },
+    }
+    if text.startswith("/"):
+        command = text.split()[0]
+        update["message"]["entities"] = [
+            {"type": "bot_command", "offset": 0, "length": len(command)}
+        ]
+    return update
+
+
+def callback_update(update_id, user_id, chat_id, data):
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": "bench",
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+            "data": data,
+            "message": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "group", "title": "Bench"},
+                "from": {"id": 1, "is_bot": True, "first_name": "Plant Bot"},
+                "text": "🌿 Plant Status",
+            },
+        },
+    }
+
+
+# name -> function(update_id, user_id, chat_id) building the update to send
+COMMANDS = {
+    "start": lambda u, user, chat: message_update(u, user, chat, "/start"),
+    "watered": lambda u, user, chat: message_update(u, user, chat, "/watered"),
+    "mystatus": lambda u, user, chat: message_update(u, user, chat, "/mystatus"),
+    "setplant": lambda u, user, chat: message_update(
+        u, user, chat, f"/setplant Bench {u}"
+    ),
+    "status": lambda u, user, chat: message_update(u, user, chat, "/status"),
+    "status_page": lambda u, user, chat: callback_update(u, user, chat, "status:0"),
+}
+
+
+class Bench:
+    """Runs scenarios and turns counters into per-scenario results"""
+
+    def __init__(self, stub, webhook, metrics, iterations):
+        self.stub = stub
+        self.webhook = webhook
+        self.metrics = metrics
+        self.iterations = iterations
+        self.update_id = 0
+
+    def next_update_id(self):
+        self.update_id += 1
+        return self.update_id
+
+    def counters(self):
+        return dict(self.metrics.REDIS_COMMANDS.values), sum(self.stub.calls.values())
+
+    def round_trips(self, before, runs):
+        """Per-run Redis round trips by command since the before snapshot"""
+        redis_before, telegram_before = before
+        redis_after, telegram_after = self.counters()
+        by_command = {}
+        for key, value in redis_after.items():
+            delta = value - redis_before.get(key, 0)
+            if delta:
+                command = dict(key).get("command", "?")
+                by_command[command] = by_command.get(command, 0) + delta / runs
+        return {
+            "redis_round_trips": round(sum(by_command.values()), 2),
+            "redis_by_command": {
+                command: round(value, 2)
+                for command, value in sorted(by_command.items())
+            },
+            "telegram_calls": round((telegram_after - telegram_before) / runs, 2),
+        }
+
+    async def command(self, build, user_ids, chat_ids):
+        from plant_bot.broadcast import percentile
+
+        latencies = []
+        before = self.counters()
+        started = time.perf_counter()
+        for i in range(self.iterations):
+            user_id = user_ids[i % len(user_ids)]
+            chat_id = chat_ids[i % len(chat_ids)]
+            update = build(self.next_update_id(), user_id, chat_id)
+            call_started = time.perf_counter()
+            await self.webhook.process_update(update)
+            latencies.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "iterations": self.iterations,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "throughput": round(self.iterations / elapsed, 1),
+            **self.round_trips(before, self.iterations),
+        }
+
+    async def duplicate(self, user_ids, chat_ids):
+        """Telegram retrying an update that was already handled"""
+        update = COMMANDS["mystatus"](self.next_update_id(), user_ids[0], chat_ids[0])
+        await self.webhook.process_update(update)
+        return await self.command(lambda *_: update, user_ids, chat_ids)
+
+    async def script(self, run):
+        """Run a script coroutine once with its output discarded"""
+        before = self.counters()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await run()
+        elapsed = time.perf_counter() - started
+        return {
+            "elapsed_ms": round(elapsed * 1000, 1),
+            **self.round_trips(before, 1),
+        }
+
+
+def make_pool(redis_url):
+    """Connection pool for the bench Redis, created on the running loop"""
+    import redis.asyncio as redis
+    from plant_bot.storage import create_redis_pool
+
+    if redis_url:
+        return create_redis_pool(redis_url)
+    from fakeredis import FakeServer
+    from fakeredis.aioredis import FakeConnection
+
+    return redis.ConnectionPool(
+        connection_class=FakeConnection,
+        server=FakeServer(),
+        encoding="utf-8",
+        decode_responses=True,
+    )
+
+
+async def make_backend(name, redis_url, directory):
+    """Empty storage backend for one dataset; returns (backend, pool or None)"""
+    if name == "sqlite":
+        from plant_bot.backends.sqlite_backend import SqliteBackend
+
+        path = tempfile.mkstemp(suffix=".db", dir=directory)[1]
+        return SqliteBackend(path), None
+
+    from plant_bot.backends.redis_backend import RedisBackend
+
+    pool = make_pool(redis_url)
+    backend = RedisBackend(pool)
+    async with backend.request_scope() as client:
+        await client.flushdb()
+    return backend, pool
+
+
+async def bench_size(bench, size, redis_url, legacy=False, backend_name="redis"):
+    """Seed one dataset and run every command and script against it"""
+    # The scripts print their configuration on import
+    with contextlib.redirect_stdout(io.StringIO()):
+        import send_reminders
+        import cleanup_old_data
+    from bench.datasets import chat_count, seed, seed_backend
+    from plant_bot.storage import plant_key
+
+    directory = tempfile.mkdtemp(prefix="plant_bot_bench_")
+    backend, pool = await make_backend(backend_name, redis_url, directory)
+    webhook = bench.webhook
+    webhook.data_manager.backend = backend
+    webhook.data_manager.cache.invalidate()
+    send_reminders.get_backend = lambda: backend
+    cleanup_old_data.get_backend = lambda: backend
+
+    record_bytes = None
+    started = time.perf_counter()
+    async with backend.request_scope() as client:
+        if client is None:
+            user_ids = await seed_backend(backend, size)
+        else:
+            user_ids = await seed(client, size, legacy=legacy)
+    seeded = time.perf_counter() - started
+    if client is not None:
+        async with backend.request_scope() as client:
+            record_bytes = await client.strlen(plant_key(user_ids[0]))
+
+    chat_ids = [-1000 - i for i in range(chat_count(size))]
+    # Warm the application so the first command doesn't pay for getMe
+    await webhook.process_update(
+        COMMANDS["mystatus"](bench.next_update_id(), user_ids[0], chat_ids[0])
+    )
+
+    result = {
+        "size": size,
+        "seed_ms": round(seeded * 1000, 1),
+        "plant_record_bytes": record_bytes,
+        "commands": {},
+    }
+    for name, build in COMMANDS.items():
+        result["commands"][name] = await bench.command(build, user_ids, chat_ids)
+        print(f"  📨 {name:<12} {format_result(result['commands'][name])}")
+    result["commands"]["new_user"] = await bench.command(
+        COMMANDS["start"],
+        [BENCH_USER_ID + i for i in range(bench.iterations)],
+        chat_ids,
+    )
+    print(f"  📨 {'new_user':<12} {format_result(result['commands']['new_user'])}")
+    result["commands"]["duplicate"] = await bench.duplicate(user_ids, chat_ids)
+    print(f"  📨 {'duplicate':<12} {format_result(result['commands']['duplicate'])}")
+
+    # Cleanup deletes most of the dataset, so it runs last
+    result["scripts"] = {}
+    for name, run in (
+        ("send_reminders", send_reminders.send_reminders),
+        ("cleanup_old_data", cleanup_old_data.cleanup_old_data),
+    ):
+        result["scripts"][name] = await bench.script(run)
+        script = result["scripts"][name]
+        print(
+            f"  📜 {name:<16} {script['elapsed_ms']:.1f}ms, "
+            f"redis {script['redis_round_trips']:.0f}, "
+            f"telegram {script['telegram_calls']:.0f}"
+        )
+
+    await webhook.close_resources()
+    if pool is not None:
+        await pool.disconnect()
+    shutil.rmtree(directory, ignore_errors=True)
+    return result
+
+
+def format_result(result):
+    return (
+        f"p50 {result['p50_ms']:.2f}ms / p99 {result['p99_ms']:.2f}ms, "
+        f"{result['throughput']:.0f}/s, redis {result['redis_round_trips']:.1f}, "
+        f"telegram {result['telegram_calls']:.1f}"
+    )
+
+
+def compare(results, baseline_path):
+    """Print p50/p99 and round-trip changes against an earlier run"""
+    with open(baseline_path) as f:
+        baseline = {entry["size"]: entry for entry in json.load(f)["results"]}
+
+    def change(new, old):
+        if not old:
+            return "   n/a"
+        return f"{(new - old) / old * 100:+5.0f}%"
+
+    print(f"\n📊 Compared with {baseline_path}:")
+    for entry in results:
+        old = baseline.get(entry["size"])
+        if old is None:
+            continue
+        print(f"  🌱 {entry['size']} plants")
+        for name, new in entry["commands"].items():
+            previous = old["commands"].get(name)
+            if previous is None:
+                continue
+            print(
+                f"    {name:<12} p50 {change(new['p50_ms'], previous['p50_ms'])}  "
+                f"p99 {change(new['p99_ms'], previous['p99_ms'])}  "
+                f"redis {previous['redis_round_trips']:.1f} -> "
+                f"{new['redis_round_trips']:.1f}"
+            )
+        for name, new in entry["scripts"].items():
+            previous = old["scripts"].get(name)
+            if previous is None:
+                continue
+            print(
+                f"    {name:<16} "
+                f"{change(new['elapsed_ms'], previous['elapsed_ms'])}  "
+                f"redis {previous['redis_round_trips']:.0f} -> "
+                f"{new['redis_round_trips']:.0f}"
+            )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help="comma-separated dataset sizes in plants (up to 100000)",
+    )
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--telegram-latency-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--backend",
+        choices=("redis", "sqlite"),
+        default="redis",
+        help="storage backend to benchmark",
+    )
+    parser.add_argument(
+        "--redis-url", help="benchmark a real Redis instead of fakeredis"
+    )
+    parser.add_argument(
+        "--allow-flush",
+        action="store_true",
+        help="required with --redis-url; the database is flushed per size",
+    )
+    parser.add_argument(
+        "--legacy-records",
+        action="store_true",
+        help="seed JSON plant records instead of the compact format",
+    )
+    parser.add_argument("--output", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results JSON to compare with")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.redis_url and not args.allow_flush:
+        print("❌ --redis-url flushes the database; pass --allow-flush to confirm")
+        return False
+    if args.legacy_records and args.backend != "redis":
+        print("❌ --legacy-records needs the redis backend")
+        return False
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    port = free_port()
+    configure_environment(port, args.redis_url)
+
+    # Bot modules read their configuration at import time
+    from api import webhook
+    from bench.telegram_stub import TelegramStub
+    from plant_bot import metrics
+
+    stub = TelegramStub(args.telegram_latency_ms)
+    webhook.run_async(stub.start(port=port))
+    bench = Bench(stub, webhook, metrics, args.iterations)
+
+    print("=" * 60)
+    print("🏁 Starting benchmark...")
+    if args.backend == "redis":
+        print(f"🗄️ Redis: {args.redis_url or 'fakeredis'}")
+    else:
+        print(f"🗄️ Storage: {args.backend}")
+    print(f"🔁 Iterations per command: {args.iterations}")
+    print("=" * 60)
+
+    results = []
+    try:
+        for size in sizes:
+            print(f"\n🌱 {size} plants")
+            results.append(
+                webhook.run_async(
+                    bench_size(
+                        bench,
+                        size,
+                        args.redis_url,
+                        args.legacy_records,
+                        args.backend,
+                    )
+                )
+            )
+    finally:
+        webhook.run_async(stub.stop())
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "meta": {
+                    "created_at": datetime.now().isoformat(),
+                    "commit": git_commit(),
+                    "python": platform.python_version(),
+                    "backend": args.backend,
+                    "redis": "redis-server" if args.redis_url else "fakeredis",
+                    "iterations": args.iterations,
+                    "telegram_latency_ms": args.telegram_latency_ms,
+                    "plant_records": "json" if args.legacy_records else "v2",
+                },
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\n💾 Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        if not main():
+            exit(1)
+        print("\n✅ Benchmark completed successfully")
+    except Exception as e:
+        print(f"\n❌ Benchmark failed with error: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,89 @@
+"""Local stand-in for api.telegram.org that answers every Bot API call"""
+
+import json
+import time
+import asyncio
+from collections import Counter
+from urllib.parse import parse_qsl
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Plant Bot", "username": "plantbot"}
+
+
+class TelegramStub:
+    """Minimal HTTP/1.1 server speaking just enough of the Bot API
+
+    Counts calls per method and can add a fixed latency to every response
+    to approximate the round trip to Telegram.
+    """
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000
+        self.calls = Counter()
+        self._server = None
+        self._message_id = 0
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def reset(self):
+        self.calls.clear()
+
+    def _result(self, method, params):
+        if method == "getMe":
+            return BOT_USER
+        if method in ("sendMessage", "editMessageText"):
+            self._message_id += 1
+            return {
+                "message_id": params.get("message_id") or self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+                "text": params.get("text", ""),
+            }
+        return True
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                path = request_line.split()[1].decode("latin-1")
+                method = path.rstrip("/").rsplit("/", 1)[-1]
+                if "json" in headers.get("content-type", ""):
+                    params = json.loads(body or b"{}")
+                else:
+                    params = dict(parse_qsl(body.decode("utf-8")))
+                self.calls[method] += 1
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                payload = json.dumps(
+                    {"ok": True, "result": self._result(method, params)}
+                ).encode("utf-8")
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
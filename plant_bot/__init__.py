@@ -0,0 +1 @@
+"""Code shared by the webhook and the scheduled scripts"""
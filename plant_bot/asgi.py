@@ -0,0 +1,97 @@
+"""Long-lived ASGI entry point for self-hosting the webhook
+
+Run with an ASGI server, e.g. ``uvicorn plant_bot.asgi:app``. Unlike the
+Vercel ``handler`` in api/webhook.py, which runs one update per request on
+its own loop, this serves many updates concurrently on one event loop while
+processing updates from the same chat in the order they arrived.
+"""
+
+import json
+import logging
+
+from api import webhook
+from plant_bot.metrics import REGISTRY
+from plant_bot.ordering import KeyedSerializer, chat_id_of
+
+logger = logging.getLogger(__name__)
+
+_chat_order = KeyedSerializer()
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _respond(send, status, body, content_type="application/json"):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode("utf-8"))],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Build the application before the first update arrives
+            await webhook.get_application()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await webhook.close_resources()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application accepting the same Telegram webhook payloads"""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    if scope["method"] == "GET" and scope["path"].rstrip("/").endswith("/metrics"):
+        headers = dict(scope.get("headers", []))
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        if not webhook.metrics_authorized(authorization):
+            await _respond(send, 401, b"", "text/plain")
+            return
+        await _respond(
+            send,
+            200,
+            REGISTRY.render().encode("utf-8"),
+            webhook.METRICS_CONTENT_TYPE,
+        )
+        return
+    if scope["method"] == "GET":
+        await _respond(
+            send,
+            200,
+            "🌱 Plant Bot is running!".encode("utf-8"),
+            "text/plain; charset=utf-8",
+        )
+        return
+    if scope["method"] != "POST":
+        await _respond(send, 405, json.dumps({"ok": False}).encode("utf-8"))
+        return
+
+    try:
+        update_data = json.loads(await _read_body(receive))
+        reply = await _chat_order.run(
+            chat_id_of(update_data), webhook.handle_webhook, update_data
+        )
+        await _respond(send, 200, json.dumps(reply or {"ok": True}).encode("utf-8"))
+    except Exception as e:
+        logger.error("❌ Error in ASGI handler: %s", e, exc_info=True)
+        await _respond(
+            send, 500, json.dumps({"ok": False, "error": str(e)}).encode("utf-8")
+        )
@@ -0,0 +1,25 @@
+"""Storage backends: Redis (the default) or a local SQLite file"""
+
+import os
+
+from .base import StorageBackend
+
+# "redis" or "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "redis")
+
+
+def get_backend(name=None):
+    """A new backend of the configured kind; only its own module is imported"""
+    name = name or STORAGE_BACKEND
+    if name == "redis":
+        from .redis_backend import RedisBackend
+
+        return RedisBackend()
+    if name == "sqlite":
+        from .sqlite_backend import SqliteBackend
+
+        return SqliteBackend()
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+__all__ = ["STORAGE_BACKEND", "StorageBackend", "get_backend"]
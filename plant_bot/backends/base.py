@@ -0,0 +1,133 @@
+"""The storage interface the bot and its scripts run on"""
+
+import contextlib
+
+
+class StorageBackend:
+    """Plants, chats and settings, wherever they are stored
+
+    Plants are plant_bot.storage.Plant dicts keyed by user_id strings.
+    Every write that changes what /status shows bumps a data version, which
+    claim_update returns so in-process caches can be checked for free.
+    Methods raise on storage errors; callers decide on fallbacks.
+    """
+
+    name = None
+
+    @contextlib.asynccontextmanager
+    async def request_scope(self):
+        """Share one connection across the calls made in a request
+
+        Yields the backend's native client, or None if it has none.
+        """
+        yield None
+
+    async def prepare(self):
+        """Upgrade data written by older versions; returns {what: count}"""
+        return {}
+
+    async def close(self):
+        """Release connections; the backend reconnects if used again"""
+
+    # Updates
+
+    async def claim_update(self, update_id, ttl, count_stats=False):
+        """Mark an update as being processed; returns (first time, data version)"""
+        raise NotImplementedError
+
+    async def release_update(self, update_id):
+        """Forget an update so Telegram's next retry is processed again"""
+        raise NotImplementedError
+
+    async def save_update_reply(self, update_id, reply):
+        """Keep a processed update's webhook reply for Telegram's retries
+
+        Returns False if a retry arrived while the update was processed, so
+        the reply must be sent some other way. Backends that keep no
+        replies return True.
+        """
+        return True
+
+    async def get_update_reply(self, update_id):
+        """The webhook reply kept for a retried update, or None"""
+        return None
+
+    # Chats and settings
+
+    async def add_chat(self, chat_id):
+        """Register a chat; returns True if it was not registered before"""
+        raise NotImplementedError
+
+    async def is_chat_registered(self, chat_id):
+        raise NotImplementedError
+
+    async def iter_chat_batches(self, batch_size=500):
+        """Yield lists of registered chat IDs (ints)"""
+        raise NotImplementedError
+        yield
+
+    async def get_reminders_enabled(self):
+        """Whether reminders are on; they are until turned off"""
+        raise NotImplementedError
+
+    async def set_reminders_enabled(self, enabled):
+        raise NotImplementedError
+
+    # Plants
+
+    async def get_plant(self, user_id):
+        """A user's plant, or None"""
+        raise NotImplementedError
+
+    async def save_plants(self, plants):
+        """Write whole plants, given as {user_id: plant}"""
+        raise NotImplementedError
+
+    async def ensure_plant(self, user_id, username, chat_id=None):
+        """Get a user's plant, creating it if missing; returns (plant, created)"""
+        raise NotImplementedError
+
+    async def mark_watered(self, user_id, username, chat_id=None, now=None):
+        """Record a watering (creating the plant if missing); returns the plant"""
+        raise NotImplementedError
+
+    async def rename_plant(self, user_id, username, plant_name, chat_id=None):
+        """Rename a user's plant (creating it if missing); returns the plant"""
+        raise NotImplementedError
+
+    async def delete_plants(self, user_ids):
+        """Delete plants; returns how many existed"""
+        raise NotImplementedError
+
+    async def iter_plants(self):
+        """Yield every (user_id, plant) pair"""
+        raise NotImplementedError
+        yield
+
+    # Aggregates
+
+    async def get_status_page(self, offset, limit):
+        """One page of plants, most overdue first; returns ({user_id: plant}, total)"""
+        raise NotImplementedError
+
+    async def iter_due_plants(self, now=None):
+        """Yield (user_id, plant) for plants due for water by now, most overdue first"""
+        raise NotImplementedError
+        yield
+
+    async def iter_stale_plants(self, cutoff):
+        """Yield (user_id, plant) for plants untouched since cutoff
+
+        A plant is touched when it is watered, or created if it never was.
+        """
+        raise NotImplementedError
+        yield
+
+    # Rendered /status pages; backends that render fast enough keep none
+
+    async def get_status_snapshot(self, offset):
+        """Returns (snapshot or None, data version)"""
+        return None, None
+
+    async def store_status_snapshot(self, offset, version, snapshot, ttl):
+        return False
@@ -0,0 +1,190 @@
+"""Redis backend, built on the plant_bot.storage helpers"""
+
+import contextlib
+import contextvars
+
+from plant_bot.instrumentation import InstrumentedRedis
+from plant_bot.storage import (
+    DUE_INDEX_KEY,
+    REMINDERS_KEY,
+    WATERING_INTERVAL,
+    get_redis_pool,
+    close_redis_pool,
+    plant_key,
+    decode_plant,
+    get_plants,
+    iter_plants,
+    save_plants,
+    ensure_plant,
+    mark_watered,
+    rename_plant,
+    prune_plants,
+    claim_update,
+    release_update,
+    save_update_reply,
+    get_update_reply,
+    add_chat,
+    is_chat_registered,
+    iter_chat_batches,
+    migrate_legacy_chat_ids,
+    ensure_due_index,
+    iter_due_plants,
+    get_status_page,
+    get_status_snapshot,
+    store_status_snapshot,
+    bump_data_version,
+)
+
+from .base import StorageBackend
+
+
+class RedisBackend(StorageBackend):
+    """Plants as keys with sorted-set indexes; see plant_bot.storage
+
+    Uses the shared pool unless given one. Plant keys expire on their own
+    after PLANT_RETENTION, so stale plants are rarely left to delete.
+    """
+
+    name = "redis"
+
+    def __init__(self, pool=None):
+        self.pool = pool
+        self._client = contextvars.ContextVar("redis_request_client", default=None)
+
+    def _new_client(self):
+        return InstrumentedRedis(connection_pool=self.pool or get_redis_pool())
+
+    def client(self):
+        """The request's client inside request_scope, else a new pooled one"""
+        return self._client.get() or self._new_client()
+
+    @contextlib.asynccontextmanager
+    async def request_scope(self):
+        """Share one pooled client across all calls made in a request
+
+        The pool hands connections out most-recently-used first, so the
+        sequential calls of a request (pipelines included) reuse one warm
+        connection.
+        """
+        client = self._new_client()
+        token = self._client.set(client)
+        try:
+            yield client
+        finally:
+            self._client.reset(token)
+            # Leaves the pool open
+            await client.aclose()
+
+    async def prepare(self):
+        """Move legacy chat IDs into the chat set and build the due index"""
+        client = self.client()
+        return {
+            "chats_migrated": await migrate_legacy_chat_ids(client),
+            "plants_indexed": await ensure_due_index(client),
+        }
+
+    async def close(self):
+        # A pool passed in belongs to the caller
+        if self.pool is None:
+            await close_redis_pool()
+
+    async def claim_update(self, update_id, ttl, count_stats=False):
+        return await claim_update(self.client(), update_id, ttl, count_stats)
+
+    async def release_update(self, update_id):
+        await release_update(self.client(), update_id)
+
+    async def save_update_reply(self, update_id, reply):
+        return await save_update_reply(self.client(), update_id, reply)
+
+    async def get_update_reply(self, update_id):
+        return await get_update_reply(self.client(), update_id)
+
+    async def add_chat(self, chat_id):
+        return await add_chat(self.client(), chat_id)
+
+    async def is_chat_registered(self, chat_id):
+        return await is_chat_registered(self.client(), chat_id)
+
+    async def iter_chat_batches(self, batch_size=500):
+        async for chat_ids in iter_chat_batches(self.client(), batch_size):
+            yield chat_ids
+
+    async def get_reminders_enabled(self):
+        return await self.client().get(REMINDERS_KEY) != "false"
+
+    async def set_reminders_enabled(self, enabled):
+        async with self.client().pipeline() as pipe:
+            pipe.set(REMINDERS_KEY, "true" if enabled else "false")
+            bump_data_version(pipe)
+            await pipe.execute()
+
+    async def get_plant(self, user_id):
+        raw = await self.client().get(plant_key(user_id))
+        return decode_plant(raw) if raw else None
+
+    async def save_plants(self, plants):
+        await save_plants(self.client(), plants)
+
+    async def ensure_plant(self, user_id, username, chat_id=None):
+        return await ensure_plant(self.client(), user_id, username, chat_id)
+
+    async def mark_watered(self, user_id, username, chat_id=None, now=None):
+        return await mark_watered(self.client(), user_id, username, chat_id, now)
+
+    async def rename_plant(self, user_id, username, plant_name, chat_id=None):
+        return await rename_plant(self.client(), user_id, username, plant_name, chat_id)
+
+    async def delete_plants(self, user_ids):
+        if not user_ids:
+            return 0
+        client = self.client()
+        deleted = await client.unlink(*[plant_key(user_id) for user_id in user_ids])
+        await prune_plants(client, [str(user_id) for user_id in user_ids])
+        return deleted
+
+    async def iter_plants(self):
+        async for user_id, plant in iter_plants(self.client()):
+            yield user_id, plant
+
+    async def get_status_page(self, offset, limit):
+        # Plants older than the due index are added by prepare()
+        return await get_status_page(self.client(), offset, limit)
+
+    async def iter_due_plants(self, now=None):
+        async for user_id, plant in iter_due_plants(self.client(), now):
+            yield user_id, plant
+
+    async def iter_stale_plants(self, cutoff):
+        """Stale plants, with candidates read from the due index
+
+        A plant is due at most WATERING_INTERVAL after it was last touched.
+        Collect the plants before deleting them: deletes shift the index.
+        """
+        client = self.client()
+        cutoff = cutoff.timestamp()
+        max_score = cutoff + WATERING_INTERVAL.total_seconds()
+        offset = 0
+        while True:
+            user_ids = await client.zrangebyscore(
+                DUE_INDEX_KEY, "-inf", max_score, start=offset, num=500
+            )
+            if not user_ids:
+                break
+            offset += len(user_ids)
+            plants, missing, _ = await get_plants(client, user_ids)
+            for user_id, plant in plants.items():
+                touched_at = plant["last_watered"] or plant["created_at"]
+                if touched_at and touched_at < cutoff:
+                    yield user_id, plant
+            if missing:
+                await prune_plants(client, missing)
+                offset -= len(missing)
+
+    async def get_status_snapshot(self, offset):
+        return await get_status_snapshot(self.client(), offset)
+
+    async def store_status_snapshot(self, offset, version, snapshot, ttl):
+        return await store_status_snapshot(
+            self.client(), offset, version, snapshot, ttl
+        )
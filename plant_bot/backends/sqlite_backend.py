@@ -0,0 +1,360 @@
+"""SQLite backend for local and small self-hosted deployments
+
+One database file in WAL mode, so readers never wait for the writer and the
+webhook and scripts can share it. Plants are rows indexed by due time, last
+watering, creation and chat, so the due, stale and /status queries are
+index range scans.
+
+Queries run on the event loop's thread: on a local file they take less time
+than handing them to a worker thread would.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import contextlib
+from datetime import datetime
+
+from plant_bot.storage import due_score, new_plant
+
+from .base import StorageBackend
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "plant_bot.db")
+# Seconds a write waits for another process's write to finish
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "5"))
+# Rows fetched per query when walking a table
+SQLITE_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plants (
+    user_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    plant_name TEXT NOT NULL,
+    last_watered INTEGER,
+    created_at INTEGER,
+    chat_id TEXT,
+    due_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plants_due_at ON plants (due_at, user_id);
+CREATE INDEX IF NOT EXISTS plants_last_watered ON plants (last_watered);
+CREATE INDEX IF NOT EXISTS plants_created_at ON plants (created_at);
+CREATE INDEX IF NOT EXISTS plants_chat_id ON plants (chat_id);
+CREATE TABLE IF NOT EXISTS chats (chat_id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS updates (
+    update_id INTEGER PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    reply TEXT
+);
+CREATE INDEX IF NOT EXISTS updates_expires_at ON updates (expires_at);
+"""
+
+PLANT_COLUMNS = "user_id, username, plant_name, last_watered, created_at, chat_id"
+
+# Plants untouched since the cutoff: a range scan on each index. Left to
+# itself the planner would look up every never watered plant instead.
+STALE_PLANTS_SQL = f"""
+SELECT {PLANT_COLUMNS} FROM plants WHERE last_watered < :cutoff
+UNION ALL
+SELECT {PLANT_COLUMNS} FROM plants INDEXED BY plants_created_at
+WHERE created_at < :cutoff AND last_watered IS NULL
+"""
+
+
+def row_plant(row):
+    """(user_id, plant) from a PLANT_COLUMNS row, shaped like decode_plant's"""
+    user_id, username, plant_name, last_watered, created_at, chat_id = row
+    return user_id, {
+        "username": username,
+        "plant_name": plant_name,
+        "last_watered": last_watered,
+        "watered_by": username if last_watered else None,
+        "created_at": created_at,
+        "chat_id": chat_id,
+    }
+
+
+class SqliteBackend(StorageBackend):
+    """Plants, chats and settings in one SQLite file
+
+    Plants do not expire on their own as Redis keys do; the cleanup job
+    deletes the stale ones. Dedup hit/miss stats are not counted.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._db = None
+
+    @property
+    def db(self):
+        """The connection, opened (and the schema created) on first use"""
+        if self._db is None:
+            db = sqlite3.connect(
+                self.path,
+                timeout=SQLITE_BUSY_TIMEOUT,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            # Durable at checkpoints; a power cut may lose the last commits
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            # Databases created before webhook replies were kept
+            columns = {row[1] for row in db.execute("PRAGMA table_info(updates)")}
+            if "reply" not in columns:
+                db.execute("ALTER TABLE updates ADD COLUMN reply TEXT")
+            self._db = db
+        return self._db
+
+    @contextlib.contextmanager
+    def _write(self):
+        """Transaction that takes the write lock up front"""
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    async def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _bump_data_version(self, db):
+        db.execute(
+            "INSERT INTO settings VALUES ('data_version', 1) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + 1"
+        )
+
+    def _data_version(self, db):
+        row = db.execute(
+            "SELECT value FROM settings WHERE name = 'data_version'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def _select_plant(self, db, user_id):
+        row = db.execute(
+            f"SELECT {PLANT_COLUMNS} FROM plants WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return row_plant(row)[1] if row else None
+
+    def _put_plant(self, db, user_id, plant):
+        chat_id = plant.get("chat_id")
+        db.execute(
+            f"INSERT OR REPLACE INTO plants ({PLANT_COLUMNS}, due_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(user_id),
+                plant["username"],
+                plant["plant_name"],
+                plant.get("last_watered"),
+                plant.get("created_at"),
+                None if chat_id is None else str(chat_id),
+                due_score(plant),
+            ),
+        )
+
+    def _walk(self, sql, params, next_params, batch_size=SQLITE_BATCH_SIZE):
+        """Batches of rows from a keyset-paginated query
+
+        Each batch resumes after the previous one's last row, using the
+        parameters next_params(row) returns, so no cursor stays open while
+        the caller works through a batch.
+        """
+        while True:
+            rows = self.db.execute(sql, {**params, "limit": batch_size}).fetchall()
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            params = {**params, **next_params(rows[-1])}
+
+    async def claim_update(self, update_id, ttl, count_stats=False):
+        now = time.time()
+        with self._write() as db:
+            db.execute("DELETE FROM updates WHERE expires_at <= ?", (now,))
+            first = db.execute(
+                "INSERT OR IGNORE INTO updates (update_id, expires_at) VALUES (?, ?)",
+                (update_id, now + ttl),
+            ).rowcount
+            return bool(first), self._data_version(db)
+
+    async def release_update(self, update_id):
+        self.db.execute("DELETE FROM updates WHERE update_id = ?", (update_id,))
+
+    # reply is NULL while the update is processed, 'retried' once a retry
+    # arrived meanwhile, then the kept webhook reply; see storage.updates
+
+    async def save_update_reply(self, update_id, reply):
+        with self._write() as db:
+            row = db.execute(
+                "SELECT reply FROM updates WHERE update_id = ?", (update_id,)
+            ).fetchone()
+            if row and row[0] == "retried":
+                return False
+            db.execute(
+                "UPDATE updates SET reply = ? WHERE update_id = ?",
+                (json.dumps(reply), update_id),
+            )
+            return True
+
+    async def get_update_reply(self, update_id):
+        with self._write() as db:
+            row = db.execute(
+                "SELECT reply FROM updates WHERE update_id = ? AND expires_at > ?",
+                (update_id, time.time()),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] is None:
+                db.execute(
+                    "UPDATE updates SET reply = 'retried' WHERE update_id = ?",
+                    (update_id,),
+                )
+            elif row[0] != "retried":
+                return json.loads(row[0])
+            return None
+
+    async def add_chat(self, chat_id):
+        cursor = self.db.execute("INSERT OR IGNORE INTO chats VALUES (?)", (chat_id,))
+        return bool(cursor.rowcount)
+
+    async def is_chat_registered(self, chat_id):
+        row = self.db.execute(
+            "SELECT 1 FROM chats WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+        return row is not None
+
+    async def iter_chat_batches(self, batch_size=SQLITE_BATCH_SIZE):
+        for rows in self._walk(
+            "SELECT chat_id FROM chats WHERE chat_id > :after "
+            "ORDER BY chat_id LIMIT :limit",
+            {"after": -(2**63)},
+            lambda row: {"after": row[0]},
+            batch_size,
+        ):
+            yield [chat_id for chat_id, in rows]
+
+    async def get_reminders_enabled(self):
+        row = self.db.execute(
+            "SELECT value FROM settings WHERE name = 'reminders_enabled'"
+        ).fetchone()
+        return row is None or row[0] != "false"
+
+    async def set_reminders_enabled(self, enabled):
+        with self._write() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO settings VALUES ('reminders_enabled', ?)",
+                ("true" if enabled else "false",),
+            )
+            self._bump_data_version(db)
+
+    async def get_plant(self, user_id):
+        return self._select_plant(self.db, user_id)
+
+    async def save_plants(self, plants):
+        with self._write() as db:
+            for user_id, plant in plants.items():
+                self._put_plant(db, user_id, plant)
+            self._bump_data_version(db)
+
+    async def ensure_plant(self, user_id, username, chat_id=None):
+        with self._write() as db:
+            plant = self._select_plant(db, user_id)
+            if plant is not None:
+                # Recording the chat doesn't change /status
+                if chat_id is not None and plant["chat_id"] != str(chat_id):
+                    db.execute(
+                        "UPDATE plants SET chat_id = ? WHERE user_id = ?",
+                        (str(chat_id), str(user_id)),
+                    )
+                    plant["chat_id"] = str(chat_id)
+                return plant, False
+            self._put_plant(db, user_id, new_plant(username, chat_id=chat_id))
+            self._bump_data_version(db)
+            return self._select_plant(db, user_id), True
+
+    async def mark_watered(self, user_id, username, chat_id=None, now=None):
+        now = now or datetime.now()
+        with self._write() as db:
+            plant = self._select_plant(db, user_id) or new_plant(username, now)
+            plant["username"] = username
+            plant["last_watered"] = int(now.timestamp())
+            if chat_id is not None:
+                plant["chat_id"] = str(chat_id)
+            self._put_plant(db, user_id, plant)
+            self._bump_data_version(db)
+            return self._select_plant(db, user_id)
+
+    async def rename_plant(self, user_id, username, plant_name, chat_id=None):
+        with self._write() as db:
+            plant = self._select_plant(db, user_id) or new_plant(username)
+            plant["plant_name"] = plant_name
+            if chat_id is not None:
+                plant["chat_id"] = str(chat_id)
+            self._put_plant(db, user_id, plant)
+            self._bump_data_version(db)
+            return self._select_plant(db, user_id)
+
+    async def delete_plants(self, user_ids):
+        user_ids = [str(user_id) for user_id in user_ids]
+        deleted = 0
+        with self._write() as db:
+            for start in range(0, len(user_ids), SQLITE_BATCH_SIZE):
+                batch = user_ids[start : start + SQLITE_BATCH_SIZE]
+                deleted += db.execute(
+                    "DELETE FROM plants WHERE user_id IN "
+                    f"({', '.join('?' * len(batch))})",
+                    batch,
+                ).rowcount
+            if deleted:
+                self._bump_data_version(db)
+        return deleted
+
+    async def iter_plants(self):
+        for rows in self._walk(
+            f"SELECT {PLANT_COLUMNS} FROM plants WHERE user_id > :after "
+            "ORDER BY user_id LIMIT :limit",
+            {"after": ""},
+            lambda row: {"after": row[0]},
+        ):
+            for row in rows:
+                yield row_plant(row)
+
+    async def get_status_page(self, offset, limit):
+        db = self.db
+        rows = db.execute(
+            f"SELECT {PLANT_COLUMNS} FROM plants "
+            "ORDER BY due_at, user_id LIMIT ? OFFSET ?",
+            (limit, offset),
+        ).fetchall()
+        (total,) = db.execute("SELECT COUNT(*) FROM plants").fetchone()
+        return dict(row_plant(row) for row in rows), total
+
+    async def iter_due_plants(self, now=None):
+        for rows in self._walk(
+            f"SELECT {PLANT_COLUMNS}, due_at FROM plants "
+            "WHERE due_at <= :max_due AND (due_at, user_id) > (:due_at, :after) "
+            "ORDER BY due_at, user_id LIMIT :limit",
+            {
+                "max_due": (now or datetime.now()).timestamp(),
+                "due_at": float("-inf"),
+                "after": "",
+            },
+            lambda row: {"due_at": row[-1], "after": row[0]},
+        ):
+            for row in rows:
+                yield row_plant(row[:-1])
+
+    async def iter_stale_plants(self, cutoff):
+        rows = self.db.execute(
+            STALE_PLANTS_SQL, {"cutoff": cutoff.timestamp()}
+        ).fetchall()
+        for row in rows:
+            yield row_plant(row)
@@ -0,0 +1,184 @@
+"""Concurrent, rate-limited delivery of Telegram messages to many chats"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+
+from telegram import Bot
+from telegram.error import (
+    BadRequest,
+    ChatMigrated,
+    Forbidden,
+    NetworkError,
+    RetryAfter,
+    TelegramError,
+)
+from telegram.request import HTTPXRequest
+
+from plant_bot.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows about 30 messages/second overall and 1/second per chat
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "16"))
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+BROADCAST_PER_CHAT_INTERVAL = float(os.getenv("BROADCAST_PER_CHAT_INTERVAL", "1"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[rank]
+
+
+def create_bot(token, concurrency=BROADCAST_CONCURRENCY):
+    """Bot whose HTTP client keeps one connection per concurrent sender"""
+    request = HTTPXRequest(connection_pool_size=concurrency, pool_timeout=30.0)
+    return Bot(token=token, request=request, base_url=TELEGRAM_BASE_URL)
+
+
+class Broadcaster:
+    """Sends (chat_id, text) messages concurrently within Telegram's limits"""
+
+    def __init__(
+        self,
+        bot,
+        concurrency=BROADCAST_CONCURRENCY,
+        rate=BROADCAST_RATE,
+        per_chat_interval=BROADCAST_PER_CHAT_INTERVAL,
+        max_retries=BROADCAST_MAX_RETRIES,
+    ):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+        self.limiter = TokenBucket(rate)
+        self._last_sent = {}
+        self.outcomes = {}
+        # Groups upgraded to supergroups: old chat ID -> new chat ID
+        self.migrated = {}
+        self.latencies = []
+        self.retries = 0
+
+    async def _wait_for_chat(self, chat_id):
+        """Keep messages to the same chat at least per_chat_interval apart"""
+        last = self._last_sent.get(chat_id)
+        if last is not None:
+            delay = last + self.per_chat_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _deliver(self, chat_id, text):
+        """Send one message, retrying rate limits and transient errors"""
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_chat(chat_id)
+            await self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text)
+                self._last_sent[chat_id] = time.monotonic()
+                self.latencies.append(self._last_sent[chat_id] - started)
+                return "sent"
+            except RetryAfter as e:
+                # Flood control applies to the whole bot, so pause everyone
+                logger.warning("Rate limited, retrying in %ss", e.retry_after)
+                self.limiter.pause(e.retry_after)
+            except ChatMigrated as e:
+                # The group became a supergroup and lives on under a new ID
+                logger.info("Chat %s migrated to %s", chat_id, e.new_chat_id)
+                self.migrated[chat_id] = e.new_chat_id
+                chat_id = e.new_chat_id
+            except (BadRequest, Forbidden) as e:
+                # Blocked bot, deleted chat, bad request: retrying won't help
+                return f"failed: {e}"
+            except NetworkError as e:
+                if attempt == self.max_retries:
+                    return f"failed: {e}"
+                backoff = min(30, 2**attempt) * (0.5 + random.random())
+                logger.warning("Transient error for %s: %s, retrying", chat_id, e)
+                await asyncio.sleep(backoff)
+            except TelegramError as e:
+                return f"failed: {e}"
+            self.retries += 1
+        return "failed: retries exhausted"
+
+    async def _worker(self, queue):
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                chat_id, text = item
+                try:
+                    outcome = await self._deliver(chat_id, text)
+                except Exception as e:
+                    # One chat's failure must not stop the others
+                    logger.error("Error sending to chat %s: %s", chat_id, e)
+                    outcome = f"failed: {e}"
+                self.outcomes[chat_id] = outcome
+            finally:
+                queue.task_done()
+
+    async def _put(self, queue, item, workers):
+        """queue.put that raises instead of waiting forever once no worker is left"""
+        if not queue.full():
+            queue.put_nowait(item)
+            return
+        put = asyncio.ensure_future(queue.put(item))
+        while not put.done():
+            alive = [worker for worker in workers if not worker.done()]
+            if not alive:
+                put.cancel()
+                raise RuntimeError("All broadcast workers stopped")
+            await asyncio.wait([put, *alive], return_when=asyncio.FIRST_COMPLETED)
+
+    async def run(self, messages):
+        """Deliver messages from an (async) iterable; returns a report dict"""
+        started = time.monotonic()
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [
+            asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)
+        ]
+        try:
+            if hasattr(messages, "__aiter__"):
+                async for item in messages:
+                    await self._put(queue, item, workers)
+            else:
+                for item in messages:
+                    await self._put(queue, item, workers)
+            for _ in workers:
+                await self._put(queue, None, workers)
+            # Keep the report even if a worker died
+            for result in await asyncio.gather(*workers, return_exceptions=True):
+                if isinstance(result, BaseException):
+                    logger.error("Broadcast worker stopped: %s", result)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed):
+        """Throughput, latency percentiles and per-chat outcomes"""
+        sent = sum(1 for outcome in self.outcomes.values() if outcome == "sent")
+        latencies = sorted(self.latencies)
+        return {
+            "sent": sent,
+            "failed": len(self.outcomes) - sent,
+            "retries": self.retries,
+            "elapsed": elapsed,
+            "throughput": sent / elapsed if elapsed > 0 else 0.0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "latency_p99": percentile(latencies, 99),
+            "outcomes": self.outcomes,
+            "migrated": self.migrated,
+        }
@@ -0,0 +1,66 @@
+"""Small in-process read-through cache for warm serverless instances"""
+
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class VersionedCache:
+    """TTL + LRU cache that is only trusted while the data version matches
+
+    Every write anywhere bumps a global version counter in Redis. sync()
+    compares it with the version this cache last saw plus the writes it
+    made itself (wrote()); any other difference means another instance
+    wrote, and the whole cache is dropped.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def sync(self, version):
+        """Adopt the current data version, dropping entries if it moved"""
+        if version is None or version != self.version:
+            self._entries.clear()
+        self.version = version
+
+    def wrote(self):
+        """Account for one version bump made by our own write"""
+        if self.version is not None:
+            self.version += 1
+
+    def invalidate(self):
+        """Forget everything, e.g. after a write that may have failed midway"""
+        self._entries.clear()
+        self.version = None
+
+    def get(self, key, default=MISSING):
+        """Cached value, or default (a miss) if absent or expired"""
+        entry = self._entries.get(key) if self.version is not None else None
+        if entry is None or entry[1] < time.monotonic():
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        if not self.enabled or self.version is None:
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
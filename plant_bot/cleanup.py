@@ -0,0 +1,272 @@
+"""Streaming cleanup of what plant expiry leaves behind
+
+Plant keys expire on their own (see plant_bot.storage.retention), so the
+regular run only walks the due index and reminder queue with ZSCAN and
+drops members whose plant is gone. Until every plant has an expiry, a run
+first walks the plant keyspace with SCAN: it deletes stale plants and gives
+the kept ones an expiry.
+
+Each page is decided in memory and committed in one transaction that also
+saves the cursor, so an interrupted run resumes where it stopped. Redis
+commands are throttled to a ceiling so a large run doesn't starve the
+webhook.
+
+Backends without key expiry (see plant_bot.backends) are cleaned by
+delete_stale_plants instead, from an indexed query for stale plants.
+"""
+
+import os
+import time
+from datetime import datetime
+
+from plant_bot.ratelimit import TokenBucket
+from plant_bot.storage import (
+    DUE_INDEX_KEY,
+    REMINDER_QUEUE_KEY,
+    PLANT_RETENTION,
+    SCAN_BATCH_SIZE,
+    scan_plant_page,
+    plant_expire_at,
+    prune_index,
+    load_cleanup_checkpoint,
+    retention_backfilled,
+    mark_retention_backfilled,
+    cleanup_page_ops,
+    commit_cleanup_page,
+    index_page_ops,
+    commit_index_page,
+)
+
+# Redis commands per second for the whole run; 0 disables the ceiling
+CLEANUP_MAX_OPS_PER_SECOND = float(os.getenv("CLEANUP_MAX_OPS_PER_SECOND", "200"))
+CLEANUP_DRY_RUN = os.getenv("CLEANUP_DRY_RUN", "false") == "true"
+# Walk every plant key even once they all have an expiry
+CLEANUP_FULL_SCAN = os.getenv("CLEANUP_FULL_SCAN", "false") == "true"
+
+NEVER_WATERED = "never_watered"
+NOT_WATERED = "not_watered"
+
+# Walked in this order; the plant keyspace only until it is backfilled
+PLANTS = "plants"
+PHASES = (PLANTS, DUE_INDEX_KEY, REMINDER_QUEUE_KEY)
+
+
+def stale_reason(plant, cutoff):
+    """NEVER_WATERED or NOT_WATERED if the plant should go, else None
+
+    cutoff is in epoch seconds.
+    """
+    last_watered = plant.get("last_watered")
+    if last_watered:
+        if last_watered < cutoff:
+            return NOT_WATERED
+        return None
+    created_at = plant.get("created_at")
+    if created_at and created_at < cutoff:
+        return NEVER_WATERED
+    return None
+
+
+class CleanupStats:
+    """Running totals of one cleanup run, carried over when it resumes"""
+
+    TOTALS = (
+        "pages",
+        "scanned",
+        "deleted",
+        "kept",
+        NEVER_WATERED,
+        NOT_WATERED,
+        "backfilled",
+        "index_scanned",
+        "pruned",
+    )
+
+    def __init__(self, checkpoint=None):
+        checkpoint = checkpoint or {}
+        for name in self.TOTALS:
+            setattr(self, name, int(checkpoint.get(name, 0)))
+        self.started_at = checkpoint.get("started_at") or datetime.now().isoformat()
+        self.resumed = bool(checkpoint)
+        self.phase = checkpoint.get("phase", PLANTS)
+        # Per invocation, not carried over
+        self.redis_ops = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def checkpoint(self, cursor):
+        """Mapping saved with each page to resume from cursor
+
+        None once the last phase is complete. It is built before the page is
+        committed, so a resumed run's backfilled and pruned totals can miss
+        the last page before the interruption.
+        """
+        phase = self.phase
+        if not cursor:
+            later = PHASES.index(phase) + 1
+            if later == len(PHASES):
+                return None
+            phase = PHASES[later]
+        totals = {name: getattr(self, name) for name in self.TOTALS}
+        return {
+            "phase": phase,
+            "cursor": cursor,
+            "started_at": self.started_at,
+            **totals,
+        }
+
+
+class Cleanup:
+    """One cleanup run; run() walks the remaining phases page by page"""
+
+    def __init__(
+        self,
+        client,
+        cutoff=None,
+        dry_run=CLEANUP_DRY_RUN,
+        max_ops_per_second=CLEANUP_MAX_OPS_PER_SECOND,
+        batch_size=SCAN_BATCH_SIZE,
+        full_scan=CLEANUP_FULL_SCAN,
+    ):
+        self.client = client
+        self.cutoff = cutoff or datetime.now() - PLANT_RETENTION
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.full_scan = full_scan
+        self.limiter = None
+        if max_ops_per_second > 0:
+            self.limiter = TokenBucket(max_ops_per_second)
+        self.stats = None
+
+    async def _throttle(self, ops):
+        self.stats.redis_ops += ops
+        if self.limiter is not None:
+            await self.limiter.acquire(ops)
+
+    async def _plant_page(self, cursor):
+        """Delete or backfill one SCAN page of plants; returns the next cursor"""
+        stats = self.stats
+        # SCAN + MGET
+        await self._throttle(2)
+        cursor, batch = await scan_plant_page(self.client, cursor, self.batch_size)
+
+        stale = []
+        expiries = {}
+        cutoff = self.cutoff.timestamp()
+        for user_id, plant in batch:
+            reason = stale_reason(plant, cutoff)
+            expire_at = plant_expire_at(plant)
+            if reason is None:
+                stats.kept += 1
+                if expire_at is not None:
+                    expiries[user_id] = expire_at
+            else:
+                stale.append(user_id)
+                setattr(stats, reason, getattr(stats, reason) + 1)
+        stats.scanned += len(batch)
+        stats.pages += 1
+        stats.deleted += len(stale)
+
+        if not self.dry_run:
+            checkpoint = stats.checkpoint(cursor)
+            await self._throttle(cleanup_page_ops(stale, checkpoint, expiries))
+            removed, backfilled = await commit_cleanup_page(
+                self.client, stale, checkpoint, expiries
+            )
+            # Deleted by someone else between MGET and UNLINK
+            stats.deleted -= len(stale) - removed
+            stats.backfilled += backfilled
+        return cursor
+
+    async def _index_page(self, cursor):
+        """Prune one ZSCAN page of an index; returns the next cursor"""
+        stats = self.stats
+        index_key = stats.phase
+        await self._throttle(1)
+        cursor, members = await self.client.zscan(
+            index_key, cursor, count=self.batch_size
+        )
+        user_ids = [user_id for user_id, _ in members]
+        stats.index_scanned += len(user_ids)
+        stats.pages += 1
+
+        if self.dry_run:
+            if user_ids:
+                await self._throttle(1)
+                stats.pruned += await prune_index(
+                    self.client, index_key, user_ids, dry_run=True
+                )
+        else:
+            checkpoint = stats.checkpoint(cursor)
+            await self._throttle(index_page_ops(user_ids, checkpoint))
+            stats.pruned += await commit_index_page(
+                self.client, index_key, user_ids, checkpoint
+            )
+        return cursor
+
+    async def run(self, on_page=None):
+        """Clean up after plant expiry; returns the CleanupStats
+
+        Resumes from a saved checkpoint if there is one. A dry run reads the
+        same pages and counts what would change, but writes nothing, not
+        even the checkpoint. on_page(stats) is called after every page.
+        """
+        checkpoint = None
+        if not self.dry_run:
+            checkpoint = await load_cleanup_checkpoint(self.client)
+        stats = self.stats = CleanupStats(checkpoint)
+        cursor = int(checkpoint["cursor"]) if checkpoint else 0
+
+        if checkpoint is None and not self.full_scan:
+            await self._throttle(1)
+            if await retention_backfilled(self.client):
+                stats.phase = PHASES[1]
+
+        for phase in PHASES[PHASES.index(stats.phase) :]:
+            stats.phase = phase
+            while True:
+                if phase == PLANTS:
+                    cursor = await self._plant_page(cursor)
+                else:
+                    cursor = await self._index_page(cursor)
+                if on_page is not None:
+                    on_page(stats)
+                if cursor == 0:
+                    break
+            if phase == PLANTS and not self.dry_run:
+                # Every plant now expires on its own
+                await self._throttle(1)
+                await mark_retention_backfilled(self.client)
+        return stats
+
+
+async def delete_stale_plants(
+    backend, cutoff=None, dry_run=CLEANUP_DRY_RUN, batch_size=SCAN_BATCH_SIZE
+):
+    """Delete plants untouched since cutoff from a backend; returns CleanupStats
+
+    Stale plants are collected before any is deleted, as deleting shifts
+    the index they are read from. Deletes go out batch_size at a time.
+    """
+    cutoff = cutoff or datetime.now() - PLANT_RETENTION
+    stats = CleanupStats()
+    stale = []
+    async for user_id, plant in backend.iter_stale_plants(cutoff):
+        reason = stale_reason(plant, cutoff.timestamp())
+        if reason is None:
+            continue
+        setattr(stats, reason, getattr(stats, reason) + 1)
+        stale.append(user_id)
+    stats.scanned = len(stale)
+
+    for start in range(0, len(stale), batch_size):
+        batch = stale[start : start + batch_size]
+        stats.pages += 1
+        if dry_run:
+            stats.deleted += len(batch)
+        else:
+            stats.deleted += await backend.delete_plants(batch)
+    return stats
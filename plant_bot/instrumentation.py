@@ -0,0 +1,186 @@
+"""Per-request spans and Redis/Telegram call accounting
+
+Everything recorded here feeds the process-wide metrics in plant_bot.metrics
+and the current request's RequestStats, which ends up in the one summary
+log line each update gets. With OTEL_TRACES_ENABLED=true the same spans are
+also emitted through the OpenTelemetry API, if it is installed; exporters
+are configured the usual OpenTelemetry way (e.g. opentelemetry-instrument).
+"""
+
+import os
+import time
+import random
+import logging
+import contextlib
+import contextvars
+
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+
+from plant_bot.metrics import (
+    UPDATES,
+    UPDATE_SECONDS,
+    SPAN_SECONDS,
+    REDIS_COMMANDS,
+    REDIS_SECONDS,
+    REDIS_BYTES,
+    TELEGRAM_CALLS,
+    TELEGRAM_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fraction of updates whose full payload is logged (0 disables dumps)
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0"))
+OTEL_TRACES_ENABLED = os.getenv("OTEL_TRACES_ENABLED", "false") == "true"
+
+_current = contextvars.ContextVar("request_stats", default=None)
+_tracer = None
+
+
+class RequestStats:
+    """Where the time of one update went"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.redis_calls = 0
+        self.redis_ms = 0.0
+        self.redis_bytes = 0
+        self.telegram_calls = 0
+        self.telegram_ms = 0.0
+        # (name, ms) of every span finished during the update
+        self.spans = []
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def finish(self, outcome, update_type):
+        """Record the finished update in the process-wide metrics"""
+        UPDATES.inc(outcome=outcome, type=update_type)
+        UPDATE_SECONDS.observe(self.elapsed_ms / 1000)
+
+
+@contextlib.contextmanager
+def track_request():
+    """Collect the spans and calls made inside the block"""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        with trace_span("update"):
+            yield stats
+    finally:
+        _current.reset(token)
+
+
+def trace_span(name, **attributes):
+    """An OpenTelemetry span if tracing is on, else a no-op context
+
+    Unlike span(), this records nothing in the metrics or request stats.
+    """
+    global _tracer, OTEL_TRACES_ENABLED
+    if not OTEL_TRACES_ENABLED:
+        return contextlib.nullcontext()
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            logger.warning("OTEL_TRACES_ENABLED is set but opentelemetry is missing")
+            OTEL_TRACES_ENABLED = False
+            return contextlib.nullcontext()
+        _tracer = trace.get_tracer("plant_bot")
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """Time a block as a named span of the current request"""
+    started = time.perf_counter()
+    try:
+        with trace_span(name, **attributes):
+            yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.observe(elapsed, span=name)
+        stats = _current.get()
+        if stats is not None:
+            stats.spans.append((name, elapsed * 1000))
+
+
+def record_redis_call(command, elapsed, sent, received):
+    REDIS_COMMANDS.inc(command=command)
+    REDIS_SECONDS.observe(elapsed, command=command)
+    REDIS_BYTES.inc(sent, direction="sent")
+    REDIS_BYTES.inc(received, direction="received")
+    stats = _current.get()
+    if stats is not None:
+        stats.redis_calls += 1
+        stats.redis_ms += elapsed * 1000
+        stats.redis_bytes += sent + received
+
+
+def record_telegram_call(method, status, elapsed):
+    TELEGRAM_CALLS.inc(method=method, status=status)
+    TELEGRAM_SECONDS.observe(elapsed, method=method)
+    stats = _current.get()
+    if stats is not None:
+        stats.telegram_calls += 1
+        stats.telegram_ms += elapsed * 1000
+
+
+def sample_payload():
+    """Whether this update's full payload should be logged"""
+    return LOG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < LOG_PAYLOAD_SAMPLE_RATE
+
+
+def payload_size(value):
+    """Approximate wire size of a Redis argument or reply"""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(payload_size(k) + payload_size(v) for k, v in value.items())
+    return 8
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline recorded as one round trip per execute()"""
+
+    async def execute(self, raise_on_error=True):
+        sent = sum(payload_size(args) for args, _ in self.command_stack)
+        started = time.perf_counter()
+        result = None
+        try:
+            with trace_span("redis PIPELINE", commands=len(self.command_stack)):
+                result = await super().execute(raise_on_error)
+            return result
+        finally:
+            record_redis_call(
+                "PIPELINE", time.perf_counter() - started, sent, payload_size(result)
+            )
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that records each round trip it makes"""
+
+    async def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        started = time.perf_counter()
+        result = None
+        try:
+            with trace_span(f"redis {command}"):
+                result = await super().execute_command(*args, **options)
+            return result
+        finally:
+            record_redis_call(
+                command,
+                time.perf_counter() - started,
+                payload_size(args),
+                payload_size(result),
+            )
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
@@ -0,0 +1,118 @@
+"""Process-wide metrics rendered in the Prometheus text format
+
+Each serverless instance keeps its own counters, so a scrape shows the
+instance that served it; they reset on a cold start.
+"""
+
+from bisect import bisect_left
+
+# Upper bounds in seconds; Redis round trips are ~1ms, Bot API calls ~100ms
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                labels = _labels(key + (("le", bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_labels(key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text):
+        metric = Counter(name, help_text)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+UPDATES = REGISTRY.counter("plant_bot_updates_total", "Updates handled by outcome")
+UPDATE_SECONDS = REGISTRY.histogram(
+    "plant_bot_update_duration_seconds", "Time to handle one update"
+)
+SPAN_SECONDS = REGISTRY.histogram(
+    "plant_bot_span_duration_seconds", "Time spent in each instrumented span"
+)
+REDIS_COMMANDS = REGISTRY.counter(
+    "plant_bot_redis_commands_total", "Redis round trips by command"
+)
+REDIS_SECONDS = REGISTRY.histogram(
+    "plant_bot_redis_command_duration_seconds", "Redis round trip latency"
+)
+REDIS_BYTES = REGISTRY.counter(
+    "plant_bot_redis_bytes_total", "Approximate Redis payload bytes by direction"
+)
+TELEGRAM_CALLS = REGISTRY.counter(
+    "plant_bot_telegram_calls_total", "Bot API calls by method and status"
+)
+TELEGRAM_SECONDS = REGISTRY.histogram(
+    "plant_bot_telegram_call_duration_seconds", "Bot API call latency"
+)
@@ -0,0 +1,45 @@
+"""Per-chat ordering for concurrently processed updates"""
+
+import asyncio
+
+
+def chat_id_of(update_data):
+    """Chat an update belongs to, or None if it has no chat"""
+    for field in ("message", "edited_message", "channel_post", "edited_channel_post"):
+        if field in update_data:
+            return update_data[field].get("chat", {}).get("id")
+    callback_query = update_data.get("callback_query")
+    if callback_query and "message" in callback_query:
+        return callback_query["message"].get("chat", {}).get("id")
+    return None
+
+
+class KeyedSerializer:
+    """Runs calls sharing a key one at a time, in the order they arrive
+
+    Calls with different keys run concurrently. asyncio.Lock wakes waiters
+    first-in first-out, which is what preserves arrival order per key.
+    """
+
+    def __init__(self):
+        # key -> [lock, number of calls holding or waiting on it]
+        self._locks = {}
+
+    async def run(self, key, func, *args):
+        if key is None:
+            return await func(*args)
+
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await func(*args)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def __len__(self):
+        return len(self._locks)
@@ -0,0 +1,105 @@
+"""Reminder message building shared by the cron job and the scheduler"""
+
+import os
+import random
+import logging
+from datetime import datetime
+from collections import defaultdict
+
+from plant_bot.storage import plant_chat_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GREETINGS = [
+    "💧 Time to water your plants!",
+    "🌱 Your plants are thirsty!",
+    "🚿 Watering time!",
+    "🌿 Don't forget your plants!",
+    "💦 Plant care reminder!",
+    "🪴 Your green friends need you!",
+    "🌺 Plant watering alert!",
+    "🍃 Time for some plant TLC!",
+    "🌵 Even cacti need water sometimes!",
+    "🌻 Keep your plants happy!",
+    "💚 Show your plants some love!",
+    "🌴 Your botanical buddies are calling!",
+]
+
+
+def load_greetings(path="plant_reminders.txt"):
+    """Custom greetings from path, one per line, or the defaults"""
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                lines = [line.strip() for line in file.readlines() if line.strip()]
+                if lines:
+                    return lines
+    except Exception as e:
+        logger.warning("Could not read %s: %s", path, e)
+    return DEFAULT_GREETINGS
+
+
+def needy_line(plant, now=None):
+    """Reminder line for a plant that needs water"""
+    name = plant["plant_name"]
+    username = plant["username"]
+
+    if not plant["last_watered"]:
+        return f"🌱 {name} ({username}) - Never watered!"
+
+    last_watered = datetime.fromtimestamp(plant["last_watered"])
+    days_overdue = ((now or datetime.now()) - last_watered).days - 3
+    if days_overdue <= 0:
+        return f"🌱 {name} ({username}) - Due today!"
+    return f"🌱 {name} ({username}) - {days_overdue} days overdue!"
+
+
+def build_message(lines, greetings=DEFAULT_GREETINGS):
+    """Reminder message listing the given plant lines"""
+    message = f"{random.choice(greetings)}\n\n"
+    message += "\n".join(lines)
+    message += "\n\nUse /watered when you've watered your plant! 🌿"
+    return message
+
+
+class ChatReminders:
+    """Needy plants grouped by the chat that owns them, built in one pass"""
+
+    def __init__(self, greetings=DEFAULT_GREETINGS):
+        self.greetings = greetings
+        self.by_chat = defaultdict(list)
+        # Plants saved before chat tracking; their owner's chat is unknown
+        self.unowned = []
+        self.plants = 0
+
+    def add(self, plant, now=None):
+        """Add a needy plant to its chat's reminder; returns its line"""
+        line = needy_line(plant, now)
+        chat_id = plant_chat_id(plant)
+        if chat_id is None:
+            self.unowned.append(line)
+        else:
+            self.by_chat[chat_id].append(line)
+        self.plants += 1
+        return line
+
+    async def messages(self, chat_batches):
+        """Yield (chat_id, text) per chat with something due
+
+        Unowned plants keep the old behaviour and are listed to every
+        registered chat, read from chat_batches (an async iterable of chat ID
+        lists), until their owner's next command records the chat.
+        """
+        for chat_id, lines in self.by_chat.items():
+            yield chat_id, build_message(lines + self.unowned, self.greetings)
+
+        if not self.unowned:
+            return
+        message = build_message(self.unowned, self.greetings)
+        # SSCAN can return a chat twice while the set is resized
+        sent = set(self.by_chat)
+        async for chat_ids in chat_batches:
+            for chat_id in chat_ids:
+                if chat_id not in sent:
+                    sent.add(chat_id)
+                    yield chat_id, message
@@ -0,0 +1,90 @@
+"""Rendering of the paginated /status overview of every plant"""
+
+from datetime import datetime, timedelta
+
+# Telegram rejects longer messages
+MAX_MESSAGE_LENGTH = 4096
+# Callback data of the page buttons is this prefix plus the page offset
+STATUS_CALLBACK_PREFIX = "status:"
+
+
+def render_status(plants, offset=0, total=None, now=None):
+    """Status text for a page of {user_id: plant}; returns (text, stale_at)
+
+    The text only changes when a plant's "days ago" count ticks over, so
+    stale_at is the earliest such moment (None if nothing will change).
+    """
+    if not plants:
+        return "🌱 No plants registered yet! Everyone should use /start first.", None
+
+    now = now or datetime.now()
+    stale_at = None
+    if total is None or total <= len(plants):
+        msg = "🌿 All Plants Status:\n\n"
+    else:
+        msg = (
+            f"🌿 All Plants Status ({offset + 1}-{offset + len(plants)} "
+            f"of {total}):\n\n"
+        )
+
+    for user_id, plant in plants.items():
+        plant_name = plant["plant_name"]
+        username = plant["username"]
+
+        msg += f"🌱 {plant_name} ({username})\n"
+
+        if not plant["last_watered"]:
+            msg += "   ❌ Never watered\n\n"
+            continue
+
+        last_watered = datetime.fromtimestamp(plant["last_watered"])
+        days_since = (now - last_watered).days
+        changes_at = last_watered + timedelta(days=days_since + 1)
+        if stale_at is None or changes_at < stale_at:
+            stale_at = changes_at
+
+        msg += f"   💧 Last: {last_watered.strftime('%m-%d %H:%M')}\n"
+        msg += f"   ⏰ {days_since} days ago\n"
+
+        if days_since >= 3:
+            msg += "   ⚠️ Needs water!\n\n"
+        else:
+            days_left = 3 - days_since
+            msg += f"   ✅ Good for {days_left} day(s)\n\n"
+
+    # Long plant names could still push a page over the limit
+    if len(msg) > MAX_MESSAGE_LENGTH:
+        msg = msg[: MAX_MESSAGE_LENGTH - 1] + "…"
+    return msg, stale_at
+
+
+def status_keyboard(offset, total, page_size):
+    """Previous/next buttons for a /status page, or None if it is the only one"""
+    # Only needed once a handler runs; keeps telegram out of cold starts
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+    buttons = []
+    if offset > 0:
+        buttons.append(
+            InlineKeyboardButton(
+                "⬅️ Previous",
+                callback_data=f"{STATUS_CALLBACK_PREFIX}{max(0, offset - page_size)}",
+            )
+        )
+    if offset + page_size < total:
+        buttons.append(
+            InlineKeyboardButton(
+                "Next ➡️", callback_data=f"{STATUS_CALLBACK_PREFIX}{offset + page_size}"
+            )
+        )
+    return InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+def parse_status_callback(data):
+    """Page offset from a status button's callback data, or None"""
+    if not data or not data.startswith(STATUS_CALLBACK_PREFIX):
+        return None
+    try:
+        return max(0, int(data[len(STATUS_CALLBACK_PREFIX) :]))
+    except ValueError:
+        return None
@@ -0,0 +1,202 @@
+"""Redis storage helpers shared by the webhook and scripts"""
+
+from .connection import (
+    REDIS_URL,
+    REDIS_MAX_CONNECTIONS,
+    connection_options,
+    create_redis_pool,
+    get_redis_pool,
+    get_redis_client,
+    close_redis_pool,
+)
+from .keys import (
+    CHAT_IDS_KEY,
+    LEGACY_CHAT_IDS_KEY,
+    REMINDERS_KEY,
+    PLANT_PREFIX,
+    DUE_INDEX_KEY,
+    DUE_INDEXED_KEY,
+    REMINDER_QUEUE_KEY,
+    REMINDER_QUEUE_SEEDED_KEY,
+    UPDATE_SEEN_PREFIX,
+    DEDUP_STATS_KEY,
+    UPDATE_STREAM_KEY,
+    UPDATE_GROUP,
+    STATUS_SNAPSHOT_PREFIX,
+    DATA_VERSION_KEY,
+    CLEANUP_CHECKPOINT_KEY,
+    RETENTION_BACKFILLED_KEY,
+    plant_key,
+    status_snapshot_key,
+)
+from .codec import Plant, PLANT_FORMAT_VERSION, encode_plant, decode_plant
+from .bulk import (
+    SCAN_BATCH_SIZE,
+    get_plants,
+    scan_plant_page,
+    iter_plant_batches,
+    iter_plants,
+    convert_plant_page,
+)
+from .due import (
+    WATERING_INTERVAL,
+    due_score,
+    index_plant,
+    iter_due_plants,
+    rebuild_due_index,
+    ensure_due_index,
+)
+from .schedule import (
+    REMINDER_REPEAT,
+    reminder_time,
+    schedule_plant,
+    pop_due_reminders,
+    reschedule_reminders,
+    next_reminder_time,
+    ensure_reminder_queue,
+)
+from .plants import (
+    new_plant,
+    plant_chat_id,
+    ensure_plant,
+    mark_watered,
+    rename_plant,
+    save_plants,
+)
+from .version import bump_data_version
+from .retention import (
+    PLANT_RETENTION,
+    plant_expire_at,
+    prune_plants,
+    backfill_expiry,
+    prune_index,
+)
+from .status import (
+    STATUS_PAGE_SIZE,
+    STATUS_SNAPSHOT_MAX_TTL,
+    get_status_page,
+    get_status_snapshot,
+    store_status_snapshot,
+)
+from .cleanup import (
+    CLEANUP_CHECKPOINT_TTL,
+    load_cleanup_checkpoint,
+    clear_cleanup_checkpoint,
+    retention_backfilled,
+    mark_retention_backfilled,
+    cleanup_page_ops,
+    commit_cleanup_page,
+    index_page_ops,
+    commit_index_page,
+)
+from .updates import (
+    claim_update,
+    release_update,
+    save_update_reply,
+    get_update_reply,
+    get_dedup_stats,
+)
+from .queue import (
+    enqueue_update,
+    ensure_group,
+    read_updates,
+    claim_stale_updates,
+    ack_updates,
+)
+from .chats import (
+    add_chat,
+    is_chat_registered,
+    iter_chat_batches,
+    migrate_legacy_chat_ids,
+)
+
+__all__ = [
+    "REDIS_URL",
+    "REDIS_MAX_CONNECTIONS",
+    "connection_options",
+    "create_redis_pool",
+    "get_redis_pool",
+    "get_redis_client",
+    "close_redis_pool",
+    "CHAT_IDS_KEY",
+    "LEGACY_CHAT_IDS_KEY",
+    "REMINDERS_KEY",
+    "PLANT_PREFIX",
+    "DUE_INDEX_KEY",
+    "DUE_INDEXED_KEY",
+    "REMINDER_QUEUE_KEY",
+    "REMINDER_QUEUE_SEEDED_KEY",
+    "UPDATE_SEEN_PREFIX",
+    "DEDUP_STATS_KEY",
+    "UPDATE_STREAM_KEY",
+    "UPDATE_GROUP",
+    "STATUS_SNAPSHOT_PREFIX",
+    "DATA_VERSION_KEY",
+    "CLEANUP_CHECKPOINT_KEY",
+    "RETENTION_BACKFILLED_KEY",
+    "plant_key",
+    "status_snapshot_key",
+    "Plant",
+    "PLANT_FORMAT_VERSION",
+    "encode_plant",
+    "decode_plant",
+    "SCAN_BATCH_SIZE",
+    "get_plants",
+    "scan_plant_page",
+    "iter_plant_batches",
+    "iter_plants",
+    "convert_plant_page",
+    "WATERING_INTERVAL",
+    "due_score",
+    "index_plant",
+    "iter_due_plants",
+    "rebuild_due_index",
+    "ensure_due_index",
+    "REMINDER_REPEAT",
+    "reminder_time",
+    "schedule_plant",
+    "pop_due_reminders",
+    "reschedule_reminders",
+    "next_reminder_time",
+    "ensure_reminder_queue",
+    "new_plant",
+    "plant_chat_id",
+    "ensure_plant",
+    "mark_watered",
+    "rename_plant",
+    "save_plants",
+    "bump_data_version",
+    "PLANT_RETENTION",
+    "plant_expire_at",
+    "prune_plants",
+    "backfill_expiry",
+    "prune_index",
+    "STATUS_PAGE_SIZE",
+    "STATUS_SNAPSHOT_MAX_TTL",
+    "get_status_page",
+    "get_status_snapshot",
+    "store_status_snapshot",
+    "CLEANUP_CHECKPOINT_TTL",
+    "load_cleanup_checkpoint",
+    "clear_cleanup_checkpoint",
+    "retention_backfilled",
+    "mark_retention_backfilled",
+    "cleanup_page_ops",
+    "commit_cleanup_page",
+    "index_page_ops",
+    "commit_index_page",
+    "claim_update",
+    "release_update",
+    "save_update_reply",
+    "get_update_reply",
+    "get_dedup_stats",
+    "enqueue_update",
+    "ensure_group",
+    "read_updates",
+    "claim_stale_updates",
+    "ack_updates",
+    "add_chat",
+    "is_chat_registered",
+    "iter_chat_batches",
+    "migrate_legacy_chat_ids",
+]
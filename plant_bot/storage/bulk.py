@@ -0,0 +1,124 @@
+"""Bulk plant reads: one MGET per batch, over given IDs or a SCAN page"""
+
+import os
+import logging
+
+from .keys import PLANT_PREFIX, plant_key
+from .codec import decode_plant, encode_plant, is_legacy_record
+
+logger = logging.getLogger(__name__)
+
+SCAN_BATCH_SIZE = int(os.getenv("REDIS_SCAN_BATCH_SIZE", "500"))
+
+# KEYS: plant keys; ARGV: the record each was read as, then its replacement
+# Replaces only records nobody changed since they were read, keeping their
+# expiry. Returns how many were replaced.
+REPLACE_RECORDS_LUA = """
+local replaced = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[2 * i - 1] then
+        redis.call('SET', key, ARGV[2 * i], 'KEEPTTL')
+        replaced = replaced + 1
+    end
+end
+return replaced
+"""
+
+
+async def get_plants(client, user_ids):
+    """Read plants in one MGET; returns ({user_id: plant}, missing, unreadable)
+
+    plants keeps the order of user_ids. missing lists the IDs with no plant
+    key (expired or deleted); unreadable the ones whose record can't be
+    decoded, which are logged.
+    """
+    plants = {}
+    missing = []
+    unreadable = []
+    if not user_ids:
+        return plants, missing, unreadable
+    values = await client.mget([plant_key(user_id) for user_id in user_ids])
+    for user_id, plant_data in zip(user_ids, values):
+        if plant_data is None:
+            missing.append(user_id)
+            continue
+        try:
+            plants[user_id] = decode_plant(plant_data)
+        except ValueError as e:
+            logger.warning("Skipping unreadable plant %s: %s", user_id, e)
+            unreadable.append(user_id)
+    return plants, missing, unreadable
+
+
+async def scan_plant_page(client, cursor=0, batch_size=SCAN_BATCH_SIZE):
+    """Read one SCAN page of plants; returns (next cursor, [(user_id, plant)])
+
+    Costs one SCAN and one MGET round trip. A next cursor of 0 means the
+    keyspace has been fully walked; any other cursor can be stored and
+    passed back later to carry on from the same place.
+    """
+    cursor, keys = await client.scan(cursor, match=f"{PLANT_PREFIX}*", count=batch_size)
+    # Plants deleted between SCAN and MGET are left out
+    plants, _, _ = await get_plants(client, [key[len(PLANT_PREFIX) :] for key in keys])
+    return int(cursor), list(plants.items())
+
+
+async def iter_plant_batches(client, batch_size=SCAN_BATCH_SIZE):
+    """Yield lists of (user_id, plant) pairs, one SCAN page at a time
+
+    Each page costs one SCAN and one MGET round trip, and only one page is
+    held in memory. SCAN may return a key more than once while Redis is
+    rehashing, so callers that must not double count should key by user_id.
+    """
+    cursor = 0
+    while True:
+        cursor, batch = await scan_plant_page(client, cursor, batch_size)
+        if batch:
+            yield batch
+        if cursor == 0:
+            break
+
+
+async def iter_plants(client, batch_size=SCAN_BATCH_SIZE):
+    """Yield (user_id, plant) pairs for every stored plant"""
+    async for batch in iter_plant_batches(client, batch_size):
+        for user_id, plant in batch:
+            yield user_id, plant
+
+
+async def convert_plant_page(
+    client, cursor=0, batch_size=SCAN_BATCH_SIZE, dry_run=False
+):
+    """Rewrite one SCAN page of legacy JSON plants as v2 records
+
+    Costs a SCAN, an MGET and, if the page has legacy records, one script
+    call. Records written since the MGET are left for a later run. Returns
+    (next cursor, {"scanned", "legacy", "converted", "unreadable"}).
+    """
+    cursor, keys = await client.scan(cursor, match=f"{PLANT_PREFIX}*", count=batch_size)
+    counts = {"scanned": 0, "legacy": 0, "converted": 0, "unreadable": 0}
+    if not keys:
+        return int(cursor), counts
+
+    replace_keys = []
+    replace_args = []
+    for key, raw in zip(keys, await client.mget(keys)):
+        if raw is None:
+            continue
+        counts["scanned"] += 1
+        if not is_legacy_record(raw):
+            continue
+        try:
+            record = encode_plant(decode_plant(raw))
+        except (ValueError, KeyError) as e:
+            logger.warning("Cannot convert plant %s: %s", key, e)
+            counts["unreadable"] += 1
+            continue
+        counts["legacy"] += 1
+        replace_keys.append(key)
+        replace_args.extend([raw, record])
+
+    if replace_keys and not dry_run:
+        script = client.register_script(REPLACE_RECORDS_LUA)
+        counts["converted"] = await script(keys=replace_keys, args=replace_args)
+    return int(cursor), counts
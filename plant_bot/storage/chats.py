@@ -0,0 +1,61 @@
+"""Registered chats, stored as a Redis set"""
+
+import json
+import logging
+
+import redis.asyncio as redis
+
+from .keys import CHAT_IDS_KEY, LEGACY_CHAT_IDS_KEY
+from .bulk import SCAN_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+async def add_chat(client, chat_id):
+    """Register a chat; returns True if it was not registered before"""
+    return bool(await client.sadd(CHAT_IDS_KEY, chat_id))
+
+
+async def is_chat_registered(client, chat_id):
+    """Check whether a chat is registered"""
+    return bool(await client.sismember(CHAT_IDS_KEY, chat_id))
+
+
+async def iter_chat_batches(client, batch_size=SCAN_BATCH_SIZE):
+    """Yield lists of registered chat IDs, one SSCAN page at a time
+
+    SSCAN may return an ID more than once while the set is being resized.
+    """
+    cursor = 0
+    while True:
+        cursor, members = await client.sscan(CHAT_IDS_KEY, cursor, count=batch_size)
+        if members:
+            yield [int(chat_id) for chat_id in members]
+        if cursor == 0:
+            break
+
+
+async def migrate_legacy_chat_ids(client):
+    """Move chat IDs from the legacy JSON array into the chat set
+
+    Returns the number of IDs migrated, or 0 when there is nothing to do.
+    The legacy key is watched so a concurrent rewrite forces a retry.
+    """
+    async with client.pipeline() as pipe:
+        while True:
+            try:
+                await pipe.watch(LEGACY_CHAT_IDS_KEY)
+                chat_ids_json = await pipe.get(LEGACY_CHAT_IDS_KEY)
+                if chat_ids_json is None:
+                    return 0
+                chat_ids = json.loads(chat_ids_json)
+
+                pipe.multi()
+                if chat_ids:
+                    pipe.sadd(CHAT_IDS_KEY, *chat_ids)
+                pipe.delete(LEGACY_CHAT_IDS_KEY)
+                await pipe.execute()
+                logger.info("Migrated %s chat IDs to %s", len(chat_ids), CHAT_IDS_KEY)
+                return len(chat_ids)
+            except redis.WatchError:
+                continue
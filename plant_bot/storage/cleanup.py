@@ -0,0 +1,98 @@
+"""Bulk removal of stale plants with a resumable SCAN checkpoint"""
+
+import os
+
+from .keys import (
+    CLEANUP_CHECKPOINT_KEY,
+    RETENTION_BACKFILLED_KEY,
+    DUE_INDEX_KEY,
+    REMINDER_QUEUE_KEY,
+    plant_key,
+)
+from .version import bump_data_version
+from .retention import backfill_expiry, prune_index
+
+# An interrupted run is only resumed if it saved progress this recently
+CLEANUP_CHECKPOINT_TTL = int(os.getenv("CLEANUP_CHECKPOINT_TTL", str(24 * 3600)))
+
+
+async def load_cleanup_checkpoint(client):
+    """Progress saved by an interrupted cleanup run, or None"""
+    return await client.hgetall(CLEANUP_CHECKPOINT_KEY) or None
+
+
+async def clear_cleanup_checkpoint(client):
+    """Forget saved progress so the next run starts from the beginning"""
+    await client.delete(CLEANUP_CHECKPOINT_KEY)
+
+
+async def retention_backfilled(client):
+    """Whether every plant key is known to carry an expiry"""
+    return bool(await client.exists(RETENTION_BACKFILLED_KEY))
+
+
+async def mark_retention_backfilled(client):
+    await client.set(RETENTION_BACKFILLED_KEY, "1")
+
+
+def _save_checkpoint(pipe, checkpoint, ttl):
+    if checkpoint is None:
+        pipe.delete(CLEANUP_CHECKPOINT_KEY)
+    else:
+        pipe.hset(CLEANUP_CHECKPOINT_KEY, mapping=checkpoint)
+        pipe.expire(CLEANUP_CHECKPOINT_KEY, ttl)
+
+
+def cleanup_page_ops(user_ids, checkpoint, expiries=None):
+    """Redis commands commit_cleanup_page sends for these arguments"""
+    return (
+        (4 if user_ids else 0)
+        + (1 if expiries else 0)
+        + (2 if checkpoint is not None else 1)
+    )
+
+
+async def commit_cleanup_page(
+    client, user_ids, checkpoint, expiries=None, ttl=CLEANUP_CHECKPOINT_TTL
+):
+    """Remove one page of plants and save progress in a single transaction
+
+    Plants go with UNLINK, which frees memory off the main Redis thread,
+    along with their due-index and reminder entries. expiries ({user_id:
+    epoch seconds}) are set on kept plants that have none yet. checkpoint
+    is the mapping to resume from (SCAN cursor plus running totals); None
+    clears it once the walk is complete. Returns (removed, expiries set).
+    """
+    async with client.pipeline(transaction=True) as pipe:
+        if user_ids:
+            pipe.unlink(*[plant_key(user_id) for user_id in user_ids])
+            pipe.zrem(DUE_INDEX_KEY, *user_ids)
+            pipe.zrem(REMINDER_QUEUE_KEY, *user_ids)
+            bump_data_version(pipe)
+        if expiries:
+            await backfill_expiry(pipe, expiries)
+        _save_checkpoint(pipe, checkpoint, ttl)
+        results = await pipe.execute()
+    removed = results[0] if user_ids else 0
+    backfilled = results[4 if user_ids else 0] if expiries else 0
+    return removed, backfilled
+
+
+def index_page_ops(user_ids, checkpoint):
+    """Redis commands commit_index_page sends for these arguments"""
+    return (1 if user_ids else 0) + (2 if checkpoint is not None else 1)
+
+
+async def commit_index_page(
+    client, index_key, user_ids, checkpoint, ttl=CLEANUP_CHECKPOINT_TTL
+):
+    """Drop index members whose plant expired and save progress atomically
+
+    Returns how many members were removed.
+    """
+    async with client.pipeline(transaction=True) as pipe:
+        if user_ids:
+            await prune_index(pipe, index_key, user_ids)
+        _save_checkpoint(pipe, checkpoint, ttl)
+        results = await pipe.execute()
+    return results[0] if user_ids else 0
@@ -0,0 +1,143 @@
+"""Plant record encoding: compact v2 records, with legacy JSON still readable
+
+A v2 record is a version byte followed by fixed fields separated by the
+ASCII unit separator:
+
+    \\x02 plant_name \\x1f username \\x1f last_watered \\x1f created_at \\x1f chat_id
+
+Times are integer epoch seconds and empty fields mean None. watered_by is
+not stored; a watering always sets it to the username. Records stay valid
+UTF-8, so clients created with decode_responses=True can read them.
+
+Decoded plants are dicts with the same keys as the JSON records, except
+that last_watered and created_at are epoch seconds.
+"""
+
+import json
+from datetime import datetime
+from typing import Optional, TypedDict
+
+PLANT_FORMAT_VERSION = 2
+V2_PREFIX = "\x02"
+SEPARATOR = "\x1f"
+
+
+class Plant(TypedDict, total=False):
+    """A decoded plant record; chat_id is missing on plants saved before it"""
+
+    username: str
+    plant_name: str
+    last_watered: Optional[int]
+    watered_by: Optional[str]
+    created_at: Optional[int]
+    chat_id: Optional[str]
+
+
+# Lua helpers prepended to the plant scripts. load_plant/dump_plant keep a
+# record in the format it was read in: legacy JSON is edited as JSON (with
+# ISO times) until the migration script converts it.
+PLANT_LUA = """
+local SEP = '\\31'
+local FIELDS = {plant_name = 1, username = 2, last_watered = 3,
+                created_at = 4, chat_id = 5}
+
+local function load_plant(raw)
+    if string.sub(raw, 1, 1) ~= '\\2' then
+        return {json = cjson.decode(raw)}
+    end
+    local fields = {}
+    for field in string.gmatch(string.sub(raw, 2) .. SEP, '(.-)' .. SEP) do
+        fields[#fields + 1] = field
+    end
+    return {fields = fields}
+end
+
+local function get_field(plant, name)
+    if plant.json then
+        local value = plant.json[name]
+        if value == cjson.null then
+            return nil
+        end
+        return value
+    end
+    local value = plant.fields[FIELDS[name]]
+    if value == '' then
+        return nil
+    end
+    return value
+end
+
+-- json_value is used instead of value for legacy JSON records, if given
+local function set_field(plant, name, value, json_value)
+    if plant.json then
+        plant.json[name] = json_value or value
+    else
+        plant.fields[FIELDS[name]] = value
+    end
+end
+
+local function dump_plant(plant)
+    if plant.json then
+        return cjson.encode(plant.json)
+    end
+    return '\\2' .. table.concat(plant.fields, SEP)
+end
+"""
+
+
+def text_field(value):
+    """User-supplied text with the separator and newlines replaced"""
+    return str(value).replace(SEPARATOR, " ").replace("\n", " ")
+
+
+def _epoch(value):
+    return "" if value is None else str(int(value))
+
+
+def encode_plant(plant: Plant) -> str:
+    """Compact v2 record for a plant dict"""
+    chat_id = plant.get("chat_id")
+    return V2_PREFIX + SEPARATOR.join(
+        [
+            text_field(plant["plant_name"]),
+            text_field(plant["username"]),
+            _epoch(plant.get("last_watered")),
+            _epoch(plant.get("created_at")),
+            "" if chat_id is None else str(chat_id),
+        ]
+    )
+
+
+def _iso_epoch(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def decode_plant(raw: str) -> Plant:
+    """Plant dict from a v2 or legacy JSON record
+
+    Raises ValueError for a record that is neither.
+    """
+    if raw.startswith(V2_PREFIX):
+        plant_name, username, last_watered, created_at, chat_id = raw[1:].split(
+            SEPARATOR
+        )
+        last_watered = int(last_watered) if last_watered else None
+        return {
+            "username": username,
+            "plant_name": plant_name,
+            "last_watered": last_watered,
+            "watered_by": username if last_watered else None,
+            "created_at": int(created_at) if created_at else None,
+            "chat_id": chat_id or None,
+        }
+
+    plant = json.loads(raw)
+    plant["last_watered"] = _iso_epoch(plant.get("last_watered"))
+    plant["created_at"] = _iso_epoch(plant.get("created_at"))
+    return plant
+
+
+def is_legacy_record(raw: str) -> bool:
+    return not raw.startswith(V2_PREFIX)
@@ -0,0 +1,73 @@
+"""Pooled Redis clients shared by the webhook and scripts
+
+Every client comes from one pool per event loop, so a process keeps its
+connections warm however many clients it creates. rediss:// URLs connect
+over TLS with the same certificate checks everywhere; set
+REDIS_SSL_CERT_REQS=none only for a server with a self-signed certificate.
+"""
+
+import os
+import asyncio
+import logging
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "10"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+# "required", "optional" or "none"
+REDIS_SSL_CERT_REQS = os.getenv("REDIS_SSL_CERT_REQS", "required")
+
+_pool = None
+_pool_loop = None
+
+
+def connection_options(url):
+    """Connection keyword arguments for a Redis URL"""
+    options = {
+        "encoding": "utf-8",
+        "decode_responses": True,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+    }
+    if url and url.startswith("rediss://"):
+        options["ssl_cert_reqs"] = REDIS_SSL_CERT_REQS
+        options["ssl_check_hostname"] = REDIS_SSL_CERT_REQS != "none"
+    return options
+
+
+def create_redis_pool(url=None, max_connections=REDIS_MAX_CONNECTIONS):
+    """New connection pool; callers block for a connection when it is full"""
+    url = url or REDIS_URL
+    return redis.BlockingConnectionPool.from_url(
+        url, max_connections=max_connections, **connection_options(url)
+    )
+
+
+def get_redis_pool():
+    """Get the shared Redis connection pool for the running event loop"""
+    global _pool, _pool_loop
+    loop = asyncio.get_running_loop()
+    # Pooled connections are bound to the loop that opened them
+    if _pool is None or _pool_loop is not loop:
+        logger.info(
+            "🔌 Creating Redis pool (max %s connections)", REDIS_MAX_CONNECTIONS
+        )
+        _pool = create_redis_pool()
+        _pool_loop = loop
+    return _pool
+
+
+async def get_redis_client():
+    """Client on the shared pool; closing it leaves the pool open"""
+    return redis.Redis(connection_pool=get_redis_pool())
+
+
+async def close_redis_pool():
+    """Disconnect the shared pool, e.g. before the event loop closes"""
+    global _pool, _pool_loop
+    if _pool is not None:
+        await _pool.disconnect()
+        _pool = None
+        _pool_loop = None
@@ -0,0 +1,93 @@
+"""Sorted-set index of plants by the time they next need water"""
+
+import logging
+from datetime import datetime, timedelta
+
+from .keys import DUE_INDEX_KEY, DUE_INDEXED_KEY
+from .bulk import SCAN_BATCH_SIZE, get_plants, iter_plant_batches
+from .retention import prune_plants
+
+logger = logging.getLogger(__name__)
+
+WATERING_INTERVAL = timedelta(days=3)
+
+
+def due_score(plant):
+    """Epoch seconds at which a plant next needs water"""
+    if plant.get("last_watered"):
+        return plant["last_watered"] + WATERING_INTERVAL.total_seconds()
+    # Never watered plants are due as soon as they exist
+    return plant.get("created_at") or 0
+
+
+def index_plant(client, user_id, plant):
+    """Queue a ZADD placing the plant in the due index
+
+    Works on a client or a pipeline; await the result on a client.
+    """
+    return client.zadd(DUE_INDEX_KEY, {str(user_id): due_score(plant)})
+
+
+async def iter_due_plants(client, now=None, batch_size=SCAN_BATCH_SIZE):
+    """Yield (user_id, plant) for plants due at or before now
+
+    Reads only index entries in range, one ZRANGEBYSCORE + MGET per batch.
+    Entries whose plant has expired are removed afterwards.
+    """
+    max_score = (now or datetime.now()).timestamp()
+    offset = 0
+    stale = []
+
+    while True:
+        user_ids = await client.zrangebyscore(
+            DUE_INDEX_KEY, "-inf", max_score, start=offset, num=batch_size
+        )
+        if not user_ids:
+            break
+        offset += len(user_ids)
+
+        plants, missing, _ = await get_plants(client, user_ids)
+        stale.extend(missing)
+        for user_id, plant in plants.items():
+            yield user_id, plant
+
+        if len(user_ids) < batch_size:
+            break
+
+    if stale:
+        await prune_plants(client, stale)
+        logger.info("Removed %s expired plants from the indexes", len(stale))
+
+
+async def rebuild_due_index(client, batch_size=SCAN_BATCH_SIZE):
+    """Index every stored plant, one ZADD NX per SCAN batch
+
+    Plants already in the index keep their score: it was set by a write
+    that may have happened after the plant was read here.
+    """
+    indexed = 0
+    async for batch in iter_plant_batches(client, batch_size):
+        scores = {}
+        for user_id, plant in batch:
+            try:
+                scores[user_id] = due_score(plant)
+            except ValueError as e:
+                logger.warning("Cannot index plant %s: %s", user_id, e)
+        if scores:
+            indexed += await client.zadd(DUE_INDEX_KEY, scores, nx=True)
+    return indexed
+
+
+async def ensure_due_index(client):
+    """Index the plants stored before the due index existed, once
+
+    The index key itself can't tell: the first write after a deploy
+    creates it. A marker is set only after a full pass has completed, so
+    an interrupted pass is simply repeated. Returns how many were added.
+    """
+    if await client.exists(DUE_INDEXED_KEY):
+        return 0
+    indexed = await rebuild_due_index(client)
+    await client.set(DUE_INDEXED_KEY, "1")
+    logger.info("Added %s plants to the due index", indexed)
+    return indexed
@@ -0,0 +1,42 @@
+"""Redis key layout"""
+
+# Set of registered chat IDs
+CHAT_IDS_KEY = "plant_bot:chat_set"
+# Pre-set JSON array of chat IDs, kept only until it is migrated
+LEGACY_CHAT_IDS_KEY = "plant_bot:chat_ids"
+REMINDERS_KEY = "plant_bot:reminders_enabled"
+PLANT_PREFIX = "plant_bot:user:"
+# Sorted set of user_id scored by the epoch time the plant next needs water
+DUE_INDEX_KEY = "plant_bot:due"
+# Set once every plant stored before the due index existed is in it
+DUE_INDEXED_KEY = "plant_bot:due_indexed"
+# Sorted set of user_id scored by the epoch time its next reminder fires
+REMINDER_QUEUE_KEY = "plant_bot:reminder_queue"
+# Set once every plant in the due index has been added to the reminder queue
+REMINDER_QUEUE_SEEDED_KEY = "plant_bot:reminder_queue_seeded"
+# Marker per processed Telegram update_id, for dropping webhook retries
+UPDATE_SEEN_PREFIX = "plant_bot:update:"
+# Hash of duplicate-update hit/miss counters
+DEDUP_STATS_KEY = "plant_bot:dedup_stats"
+# Stream of webhook updates waiting for a worker, and its consumer group
+UPDATE_STREAM_KEY = "plant_bot:updates"
+UPDATE_GROUP = "workers"
+# Pre-rendered /status pages by offset
+STATUS_SNAPSHOT_PREFIX = "plant_bot:status:"
+# Counter bumped by every plant or settings write; /status snapshots and
+# in-process caches are only trusted while it is unchanged
+DATA_VERSION_KEY = "plant_bot:data_version"
+# Hash with the SCAN cursor and totals of an unfinished cleanup run
+CLEANUP_CHECKPOINT_KEY = "plant_bot:cleanup:checkpoint"
+# Set once every plant key has been given an expiry
+RETENTION_BACKFILLED_KEY = "plant_bot:retention_backfilled"
+
+
+def plant_key(user_id):
+    """Redis key holding a user's plant"""
+    return f"{PLANT_PREFIX}{user_id}"
+
+
+def status_snapshot_key(offset):
+    """Redis key holding the /status page starting at offset"""
+    return f"{STATUS_SNAPSHOT_PREFIX}{offset}"
@@ -0,0 +1,201 @@
+"""Atomic single-round-trip plant updates implemented as Lua scripts"""
+
+from datetime import datetime
+
+from .keys import DUE_INDEX_KEY, REMINDER_QUEUE_KEY, DATA_VERSION_KEY, plant_key
+from .codec import PLANT_LUA, encode_plant, decode_plant, text_field
+from .due import due_score, index_plant
+from .schedule import reminder_time, schedule_plant
+from .retention import plant_expire_at
+from .version import bump_data_version
+
+# Every script takes the chat the command came from ("" if unknown) and
+# records it as the plant's chat_id, so reminders reach the chat that owns
+# the plant. Chat IDs are stored as strings: Lua numbers would lose
+# precision on large supergroup IDs. Writes that change what /status shows
+# bump the data version so snapshots and caches are refreshed. A watering
+# restarts the plant's expiry; other updates keep it (KEEPTTL). New plants
+# are written as v2 records; legacy JSON records are edited as JSON.
+
+# KEYS: plant, due index, reminder queue, data version
+# ARGV: user_id, new plant record, its due score, its reminder time, chat_id,
+#       its expiry
+# Returns {plant record, 1 if created}
+ENSURE_PLANT_LUA = PLANT_LUA + """
+local raw = redis.call('GET', KEYS[1])
+if raw then
+    local plant = load_plant(raw)
+    if ARGV[5] ~= '' and get_field(plant, 'chat_id') ~= ARGV[5] then
+        set_field(plant, 'chat_id', ARGV[5])
+        raw = dump_plant(plant)
+        redis.call('SET', KEYS[1], raw, 'KEEPTTL')
+    end
+    return {raw, 0}
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EXAT', ARGV[6])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+redis.call('ZADD', KEYS[3], ARGV[4], ARGV[1])
+redis.call('INCR', KEYS[4])
+return {ARGV[2], 1}
+"""
+
+# KEYS: plant, due index, reminder queue, data version
+# ARGV: user_id, new plant record, username, watered at (epoch), due score,
+#       chat_id, expiry, watered at (ISO, for legacy JSON records)
+# Returns the updated plant record; the next reminder fires when it is due
+MARK_WATERED_LUA = PLANT_LUA + """
+local plant = load_plant(redis.call('GET', KEYS[1]) or ARGV[2])
+set_field(plant, 'last_watered', ARGV[4], ARGV[8])
+set_field(plant, 'username', ARGV[3])
+if plant.json then
+    plant.json['watered_by'] = ARGV[3]
+end
+if ARGV[6] ~= '' then
+    set_field(plant, 'chat_id', ARGV[6])
+end
+local raw = dump_plant(plant)
+redis.call('SET', KEYS[1], raw, 'EXAT', ARGV[7])
+redis.call('ZADD', KEYS[2], ARGV[5], ARGV[1])
+redis.call('ZADD', KEYS[3], ARGV[5], ARGV[1])
+redis.call('INCR', KEYS[4])
+return raw
+"""
+
+# KEYS: plant, due index, reminder queue, data version
+# ARGV: user_id, new plant record, its due score, plant name, its reminder
+#       time, chat_id, its expiry
+# Returns the updated plant record
+RENAME_PLANT_LUA = PLANT_LUA + """
+local raw = redis.call('GET', KEYS[1])
+local expiry = {'KEEPTTL'}
+if not raw then
+    raw = ARGV[2]
+    expiry = {'EXAT', ARGV[7]}
+    redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+    redis.call('ZADD', KEYS[3], ARGV[5], ARGV[1])
+end
+local plant = load_plant(raw)
+set_field(plant, 'plant_name', ARGV[4])
+if ARGV[6] ~= '' then
+    set_field(plant, 'chat_id', ARGV[6])
+end
+raw = dump_plant(plant)
+redis.call('SET', KEYS[1], raw, unpack(expiry))
+redis.call('INCR', KEYS[4])
+return raw
+"""
+
+
+def new_plant(username, now=None, chat_id=None):
+    """Plant record for a user who has none yet"""
+    plant = {
+        "username": username,
+        "plant_name": f"{username}'s Plant",
+        "last_watered": None,
+        "watered_by": None,
+        "created_at": int((now or datetime.now()).timestamp()),
+    }
+    if chat_id is not None:
+        plant["chat_id"] = str(chat_id)
+    return plant
+
+
+def plant_chat_id(plant):
+    """Chat that owns a plant, or None for records from before chat tracking"""
+    chat_id = plant.get("chat_id")
+    return int(chat_id) if chat_id else None
+
+
+def _chat_arg(chat_id):
+    return "" if chat_id is None else str(chat_id)
+
+
+async def ensure_plant(client, user_id, username, chat_id=None):
+    """Get a user's plant, creating it if missing; returns (plant, created)"""
+    plant = new_plant(username, chat_id=chat_id)
+    script = client.register_script(ENSURE_PLANT_LUA)
+    raw, created = await script(
+        keys=[
+            plant_key(user_id),
+            DUE_INDEX_KEY,
+            REMINDER_QUEUE_KEY,
+            DATA_VERSION_KEY,
+        ],
+        args=[
+            user_id,
+            encode_plant(plant),
+            due_score(plant),
+            reminder_time(plant),
+            _chat_arg(chat_id),
+            plant_expire_at(plant),
+        ],
+    )
+    return decode_plant(raw), bool(created)
+
+
+async def mark_watered(client, user_id, username, chat_id=None, now=None):
+    """Record a watering (creating the plant if missing); returns the plant"""
+    now = now or datetime.now()
+    plant = new_plant(username, now, chat_id)
+    watered = {**plant, "last_watered": int(now.timestamp())}
+    script = client.register_script(MARK_WATERED_LUA)
+    raw = await script(
+        keys=[
+            plant_key(user_id),
+            DUE_INDEX_KEY,
+            REMINDER_QUEUE_KEY,
+            DATA_VERSION_KEY,
+        ],
+        args=[
+            user_id,
+            encode_plant(plant),
+            text_field(username),
+            watered["last_watered"],
+            due_score(watered),
+            _chat_arg(chat_id),
+            plant_expire_at(watered),
+            now.isoformat(),
+        ],
+    )
+    return decode_plant(raw)
+
+
+async def rename_plant(client, user_id, username, plant_name, chat_id=None):
+    """Rename a user's plant (creating it if missing); returns the plant"""
+    plant = new_plant(username, chat_id=chat_id)
+    script = client.register_script(RENAME_PLANT_LUA)
+    raw = await script(
+        keys=[
+            plant_key(user_id),
+            DUE_INDEX_KEY,
+            REMINDER_QUEUE_KEY,
+            DATA_VERSION_KEY,
+        ],
+        args=[
+            user_id,
+            encode_plant(plant),
+            due_score(plant),
+            text_field(plant_name),
+            reminder_time(plant),
+            _chat_arg(chat_id),
+            plant_expire_at(plant),
+        ],
+    )
+    return decode_plant(raw)
+
+
+async def save_plants(client, plants):
+    """Write whole plants with their index entries in one transaction
+
+    plants maps user_id to plant. Each key gets its plant's expiry; the data
+    version is bumped once for the lot.
+    """
+    async with client.pipeline() as pipe:
+        for user_id, plant in plants.items():
+            pipe.set(
+                plant_key(user_id), encode_plant(plant), exat=plant_expire_at(plant)
+            )
+            index_plant(pipe, user_id, plant)
+            schedule_plant(pipe, user_id, plant)
+        bump_data_version(pipe)
+        await pipe.execute()
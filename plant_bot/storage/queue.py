@@ -0,0 +1,82 @@
+"""Redis Streams queue of webhook updates for the batch worker"""
+
+import json
+
+import redis.asyncio as redis
+
+from .keys import UPDATE_STREAM_KEY, UPDATE_GROUP
+
+
+async def enqueue_update(client, update_data, maxlen=None):
+    """Append an update to the stream; returns its entry ID"""
+    return await client.xadd(
+        UPDATE_STREAM_KEY,
+        {"update": json.dumps(update_data)},
+        maxlen=maxlen,
+        approximate=True,
+    )
+
+
+async def ensure_group(client):
+    """Create the consumer group (and stream) if they do not exist yet"""
+    try:
+        await client.xgroup_create(
+            UPDATE_STREAM_KEY, UPDATE_GROUP, id="0", mkstream=True
+        )
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _decode_entries(entries):
+    return [
+        (entry_id, json.loads(fields["update"]))
+        for entry_id, fields in entries
+        if fields
+    ]
+
+
+async def read_updates(client, consumer, count, block_ms):
+    """Read up to count new updates for this consumer as (entry_id, update)"""
+    response = await client.xreadgroup(
+        UPDATE_GROUP, consumer, {UPDATE_STREAM_KEY: ">"}, count=count, block=block_ms
+    )
+    if not response:
+        return []
+    _, entries = response[0]
+    return _decode_entries(entries)
+
+
+async def claim_stale_updates(client, consumer, min_idle_ms, count):
+    """Take over updates left pending by a crashed or stuck consumer
+
+    Returns (entry_id, update, times_delivered) tuples.
+    """
+    _, entries, *_ = await client.xautoclaim(
+        UPDATE_STREAM_KEY, UPDATE_GROUP, consumer, min_idle_ms, count=count
+    )
+    updates = _decode_entries(entries)
+    if not updates:
+        return []
+
+    pending = await client.xpending_range(
+        UPDATE_STREAM_KEY,
+        UPDATE_GROUP,
+        min=updates[0][0],
+        max=updates[-1][0],
+        count=len(entries),
+    )
+    deliveries = {p["message_id"]: p["times_delivered"] for p in pending}
+    return [
+        (entry_id, update, deliveries.get(entry_id, 1)) for entry_id, update in updates
+    ]
+
+
+async def ack_updates(client, entry_ids):
+    """Acknowledge processed updates and drop them from the stream"""
+    if not entry_ids:
+        return
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.xack(UPDATE_STREAM_KEY, UPDATE_GROUP, *entry_ids)
+        pipe.xdel(UPDATE_STREAM_KEY, *entry_ids)
+        await pipe.execute()
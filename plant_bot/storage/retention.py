@@ -0,0 +1,95 @@
+"""Plant retention enforced by key expiry, plus lazy repair of the indexes
+
+Every write sets a plant key to expire PLANT_RETENTION after its last
+watering (or creation), so Redis drops untouched plants on its own. Index
+entries outlive their plant; readers that find one remove it with
+prune_plants, and the cleanup job sweeps whatever is left.
+"""
+
+import os
+from datetime import timedelta
+
+from .keys import DUE_INDEX_KEY, REMINDER_QUEUE_KEY, DATA_VERSION_KEY, plant_key
+from .version import bump_data_version
+
+PLANT_RETENTION = timedelta(days=float(os.getenv("PLANT_RETENTION_DAYS", "7")))
+
+# KEYS: plant keys; ARGV: matching expiry epoch seconds
+# Sets expiries only on keys that have none, so a plant written since it
+# was read keeps the later expiry its write gave it. Returns how many
+# were set.
+BACKFILL_EXPIRY_LUA = """
+local set = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('TTL', key) == -1 then
+        redis.call('EXPIREAT', key, ARGV[i])
+        set = set + 1
+    end
+end
+return set
+"""
+
+# KEYS: index sorted set, data version, plant keys
+# ARGV: "1" for a dry run, then the user_id of each plant key
+# Removes members whose plant key no longer exists; returns how many
+PRUNE_INDEX_LUA = """
+local missing = {}
+for i = 3, #KEYS do
+    if redis.call('EXISTS', KEYS[i]) == 0 then
+        table.insert(missing, ARGV[i - 1])
+    end
+end
+if #missing > 0 and ARGV[1] ~= '1' then
+    redis.call('ZREM', KEYS[1], unpack(missing))
+    redis.call('INCR', KEYS[2])
+end
+return #missing
+"""
+
+
+def plant_expire_at(plant):
+    """Epoch seconds at which an untouched plant expires, or None"""
+    touched_at = plant.get("last_watered") or plant.get("created_at")
+    if not touched_at:
+        return None
+    return int(touched_at + PLANT_RETENTION.total_seconds())
+
+
+async def prune_plants(client, user_ids):
+    """Remove expired plants' due-index and reminder entries in one round trip
+
+    Also bumps the data version, since /status pages counted them.
+    """
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.zrem(DUE_INDEX_KEY, *user_ids)
+        pipe.zrem(REMINDER_QUEUE_KEY, *user_ids)
+        bump_data_version(pipe)
+        await pipe.execute()
+
+
+def backfill_expiry(client, expiries):
+    """Queue expiries for plants saved before retention used key expiry
+
+    expiries maps user_id to epoch seconds. Works on a client or a pipeline;
+    await it either way.
+    """
+    script = client.register_script(BACKFILL_EXPIRY_LUA)
+    return script(
+        keys=[plant_key(user_id) for user_id in expiries],
+        args=list(expiries.values()),
+        client=client,
+    )
+
+
+def prune_index(client, index_key, user_ids, dry_run=False):
+    """Queue removal of index members whose plant has expired
+
+    One script call whatever the batch size; a dry run only counts them.
+    Works on a client or a pipeline; await it either way.
+    """
+    script = client.register_script(PRUNE_INDEX_LUA)
+    return script(
+        keys=[index_key, DATA_VERSION_KEY, *[plant_key(u) for u in user_ids]],
+        args=["1" if dry_run else "0", *user_ids],
+        client=client,
+    )
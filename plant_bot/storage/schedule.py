@@ -0,0 +1,117 @@
+"""Delayed queue of per-plant reminders (sorted set of fire times)"""
+
+import os
+import logging
+from datetime import datetime, timedelta
+
+from .keys import DUE_INDEX_KEY, REMINDER_QUEUE_KEY, REMINDER_QUEUE_SEEDED_KEY
+from .bulk import SCAN_BATCH_SIZE, get_plants
+from .due import due_score, ensure_due_index
+from .retention import prune_plants
+
+logger = logging.getLogger(__name__)
+
+# How long after a reminder (or after /start) the next one fires
+REMINDER_REPEAT = timedelta(hours=float(os.getenv("REMINDER_REPEAT_HOURS", "12")))
+
+# KEYS: reminder queue
+# ARGV: user_id, score it was read with, new score (repeated)
+# Only moves entries nobody rescheduled (e.g. via /watered) in the meantime
+RESCHEDULE_LUA = """
+local moved = 0
+for i = 1, #ARGV, 3 do
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if score and tonumber(score) == tonumber(ARGV[i + 1]) then
+        redis.call('ZADD', KEYS[1], ARGV[i + 2], ARGV[i])
+        moved = moved + 1
+    end
+end
+return moved
+"""
+
+
+def reminder_time(plant):
+    """Epoch seconds at which a plant's next reminder should fire"""
+    if plant.get("last_watered"):
+        return due_score(plant)
+    # Give new plants some time before nagging about the first watering
+    created_at = plant.get("created_at") or datetime.now().timestamp()
+    return created_at + REMINDER_REPEAT.total_seconds()
+
+
+async def pop_due_reminders(client, now=None, limit=100):
+    """Get up to limit reminders due at or before now
+
+    Returns (user_id, plant, score) tuples. Entries whose plant has expired
+    are removed from both indexes; unreadable ones from the queue.
+    """
+    max_score = (now or datetime.now()).timestamp()
+    entries = await client.zrangebyscore(
+        REMINDER_QUEUE_KEY, "-inf", max_score, start=0, num=limit, withscores=True
+    )
+    if not entries:
+        return []
+
+    plants, expired, stale = await get_plants(
+        client, [user_id for user_id, _ in entries]
+    )
+    due = [
+        (user_id, plants[user_id], score)
+        for user_id, score in entries
+        if user_id in plants
+    ]
+
+    if expired:
+        await prune_plants(client, expired)
+    if stale:
+        await client.zrem(REMINDER_QUEUE_KEY, *stale)
+    return due
+
+
+async def reschedule_reminders(client, fired, fire_at):
+    """Move fired (user_id, score) reminders to fire_at unless changed since"""
+    if not fired:
+        return 0
+    args = []
+    for user_id, score in fired:
+        args += [user_id, score, fire_at]
+    script = client.register_script(RESCHEDULE_LUA)
+    return await script(keys=[REMINDER_QUEUE_KEY], args=args)
+
+
+async def next_reminder_time(client):
+    """Epoch seconds of the earliest scheduled reminder, or None"""
+    first = await client.zrange(REMINDER_QUEUE_KEY, 0, 0, withscores=True)
+    return first[0][1] if first else None
+
+
+async def ensure_reminder_queue(client, batch_size=SCAN_BATCH_SIZE):
+    """Queue the plants indexed before the reminder queue existed, once
+
+    Like ensure_due_index, gated on a marker set after a full pass rather
+    than on the queue key, which the first write creates. Entries are copied
+    from the due index with ZADD NX, keeping those writes have scheduled.
+    Returns how many were added.
+    """
+    if await client.exists(REMINDER_QUEUE_SEEDED_KEY):
+        return 0
+    await ensure_due_index(client)
+    seeded = 0
+    cursor = 0
+    while True:
+        cursor, entries = await client.zscan(DUE_INDEX_KEY, cursor, count=batch_size)
+        if entries:
+            seeded += await client.zadd(REMINDER_QUEUE_KEY, dict(entries), nx=True)
+        if cursor == 0:
+            break
+    await client.set(REMINDER_QUEUE_SEEDED_KEY, "1")
+    logger.info("Seeded reminder queue with %s plants", seeded)
+    return seeded
+
+
+def schedule_plant(client, user_id, plant):
+    """Queue a ZADD scheduling the plant's next reminder
+
+    Works on a client or a pipeline; await the result on a client.
+    """
+    return client.zadd(REMINDER_QUEUE_KEY, {str(user_id): reminder_time(plant)})
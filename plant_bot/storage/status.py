@@ -0,0 +1,72 @@
+"""Pre-rendered /status pages, invalidated by a version counter"""
+
+import os
+import json
+from datetime import timedelta
+
+from .keys import DUE_INDEX_KEY, DATA_VERSION_KEY, status_snapshot_key
+from .bulk import get_plants
+from .retention import prune_plants
+
+# Plants listed per /status page
+STATUS_PAGE_SIZE = int(os.getenv("STATUS_PAGE_SIZE", "20"))
+# Even a page with nothing time-dependent in it is rebuilt this often
+STATUS_SNAPSHOT_MAX_TTL = timedelta(days=1)
+
+# KEYS: snapshot, version
+# ARGV: version the snapshot was built from, snapshot JSON, TTL in ms
+# Stores the snapshot only if no write bumped the version meanwhile
+STORE_SNAPSHOT_LUA = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+return 1
+"""
+
+
+async def get_status_page(client, offset, limit=STATUS_PAGE_SIZE):
+    """One page of plants, most overdue first; returns ({user_id: plant}, total)
+
+    Pages by rank over the due index: one ZRANGE + ZCARD and one MGET.
+    Entries whose plant has expired are removed and left off the page.
+    """
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.zrange(DUE_INDEX_KEY, offset, offset + limit - 1)
+        pipe.zcard(DUE_INDEX_KEY)
+        user_ids, total = await pipe.execute()
+
+    plants, expired, _ = await get_plants(client, user_ids)
+    if expired:
+        await prune_plants(client, expired)
+        total -= len(expired)
+    return plants, total
+
+
+async def get_status_snapshot(client, offset):
+    """A page's snapshot in one MGET; returns (snapshot or None, version)
+
+    A snapshot is a dict with the page's "text" and the "total" plant count.
+    """
+    raw, version = await client.mget(status_snapshot_key(offset), DATA_VERSION_KEY)
+    version = version or "0"
+    if raw:
+        snapshot = json.loads(raw)
+        if snapshot["version"] == version:
+            return snapshot, version
+    return None, version
+
+
+async def store_status_snapshot(client, offset, version, snapshot, ttl):
+    """Store a page snapshot built from version, unless it is already stale"""
+    ttl = min(ttl, STATUS_SNAPSHOT_MAX_TTL)
+    script = client.register_script(STORE_SNAPSHOT_LUA)
+    stored = await script(
+        keys=[status_snapshot_key(offset), DATA_VERSION_KEY],
+        args=[
+            version,
+            json.dumps({**snapshot, "version": version}),
+            max(1000, int(ttl.total_seconds() * 1000)),
+        ],
+    )
+    return bool(stored)
@@ -0,0 +1,96 @@
+"""Idempotency guard for Telegram webhook retries"""
+
+import json
+
+from .keys import UPDATE_SEEN_PREFIX, DEDUP_STATS_KEY, DATA_VERSION_KEY
+
+# KEYS: update marker, stats hash, data version
+# ARGV: ttl seconds, "1" to count hits/misses
+# Returns {1 if this is the first time the update is seen, data version}
+CLAIM_UPDATE_LUA = """
+local first = redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[1])
+if ARGV[2] == '1' then
+    redis.call('HINCRBY', KEYS[2], first and 'misses' or 'hits', 1)
+end
+return {first and 1 or 0, redis.call('GET', KEYS[3]) or '0'}
+"""
+
+
+async def claim_update(client, update_id, ttl, count_stats=False):
+    """Mark an update as being processed; returns (first time, data version)
+
+    The data version rides along so in-process caches can be checked
+    without another round trip.
+    """
+    script = client.register_script(CLAIM_UPDATE_LUA)
+    first, version = await script(
+        keys=[f"{UPDATE_SEEN_PREFIX}{update_id}", DEDUP_STATS_KEY, DATA_VERSION_KEY],
+        args=[ttl, "1" if count_stats else "0"],
+    )
+    return bool(first), int(version)
+
+
+async def release_update(client, update_id):
+    """Forget an update so Telegram's next retry is processed again"""
+    await client.delete(f"{UPDATE_SEEN_PREFIX}{update_id}")
+
+
+# The marker is '1' while the update is processed. A retry arriving then
+# turns it into 'retried': Telegram gave up on the first response, so a
+# reply held for it has to be sent separately. Once processed, the marker
+# keeps the webhook reply so later retries can be answered with it.
+
+# KEYS: update marker. ARGV: reply JSON
+# Returns 1 if the reply was kept, 0 if a retry already arrived
+SAVE_REPLY_LUA = """
+local marker = redis.call('GET', KEYS[1])
+if marker == 'retried' then
+    return 0
+end
+if marker then
+    redis.call('SET', KEYS[1], ARGV[1], 'XX', 'KEEPTTL')
+end
+return 1
+"""
+
+# KEYS: update marker. Returns the kept reply JSON, or nil
+GET_REPLY_LUA = """
+local marker = redis.call('GET', KEYS[1])
+if marker == '1' then
+    redis.call('SET', KEYS[1], 'retried', 'XX', 'KEEPTTL')
+elseif marker and string.sub(marker, 1, 1) == '{' then
+    return marker
+end
+return nil
+"""
+
+
+async def save_update_reply(client, update_id, reply):
+    """Keep a processed update's webhook reply for Telegram's retries
+
+    Returns False if a retry arrived while the update was processed, in
+    which case the webhook response is dropped and the reply must be sent
+    some other way.
+    """
+    script = client.register_script(SAVE_REPLY_LUA)
+    kept = await script(
+        keys=[f"{UPDATE_SEEN_PREFIX}{update_id}"], args=[json.dumps(reply)]
+    )
+    return bool(kept)
+
+
+async def get_update_reply(client, update_id):
+    """The webhook reply kept for a retried update, or None
+
+    A retry of an update still being processed is noted, so
+    save_update_reply knows the first response will be dropped.
+    """
+    script = client.register_script(GET_REPLY_LUA)
+    reply = await script(keys=[f"{UPDATE_SEEN_PREFIX}{update_id}"])
+    return json.loads(reply) if reply else None
+
+
+async def get_dedup_stats(client):
+    """Duplicate-update hits and misses counted in Redis"""
+    stats = await client.hgetall(DEDUP_STATS_KEY)
+    return {field: int(stats.get(field, 0)) for field in ("hits", "misses")}
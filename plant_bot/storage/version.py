@@ -0,0 +1,11 @@
+"""Global data version shared by every writer"""
+
+from .keys import DATA_VERSION_KEY
+
+
+def bump_data_version(client):
+    """Queue an INCR marking /status snapshots and cached data stale
+
+    Works on a client or a pipeline; await the result on a client.
+    """
+    return client.incr(DATA_VERSION_KEY)
@@ -0,0 +1,22 @@
+"""Bot API transport that records each call for instrumentation"""
+
+import time
+
+from telegram.request import HTTPXRequest
+
+from plant_bot.instrumentation import record_telegram_call, trace_span
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest that records the method, status and latency of each call"""
+
+    async def do_request(self, url, method, *args, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with trace_span(f"telegram {api_method}"):
+                status, payload = await super().do_request(url, method, *args, **kwargs)
+            return status, payload
+        finally:
+            record_telegram_call(api_method, status, time.perf_counter() - started)
@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budget for importing the webhook module, in milliseconds
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "250"))
+IMPORT_RUNS = int(os.getenv("IMPORT_RUNS", "5"))
+# Packages a cold start (health check, duplicate update) must not load
+FORBIDDEN_PACKAGES = ("telegram",)
+
+# Runs in a fresh interpreter; prints the forbidden modules it ended up with
+PROBE = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+from api import webhook
+print(json.dumps(sorted(
+    name for name in sys.modules if name.split(".")[0] in {FORBIDDEN_PACKAGES!r}
+)))
+"""
+
+
+def parse_importtime(stderr):
+    """(self us, cumulative us, depth, module) rows from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def measure_once():
+    """Import api.webhook in a new interpreter; returns (ms, rows, forbidden)"""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import json\n" + PROBE],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing api.webhook failed:\n{result.stderr}")
+
+    rows = parse_importtime(result.stderr)
+    # api.webhook's cumulative time covers everything it imports
+    total_us = next(
+        cumulative for _, cumulative, _, name in rows if name == "api.webhook"
+    )
+    forbidden = json.loads(result.stdout.strip().splitlines()[-1])
+    return total_us / 1000, rows, forbidden
+
+
+def check_import_time():
+    """Measure the webhook cold-start import and compare it to the budget"""
+    print("=" * 60)
+    print("⏱️ Measuring api.webhook import time...")
+    print(f"🔁 Runs: {IMPORT_RUNS}, budget: {IMPORT_BUDGET_MS:.0f}ms")
+    print("=" * 60)
+
+    timings = []
+    for _ in range(IMPORT_RUNS):
+        ms, rows, forbidden = measure_once()
+        timings.append(ms)
+
+    median = statistics.median(timings)
+
+    # Heaviest modules imported directly by api.webhook in the last run
+    webhook_depth = next(depth for _, _, depth, name in rows if name == "api.webhook")
+    direct = [row for row in rows if row[2] == webhook_depth + 1]
+    heaviest = sorted(direct, key=lambda row: row[1], reverse=True)[:10]
+    print("\n📦 Heaviest direct imports:")
+    for _, cumulative, _, name in heaviest:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    print(f"\n{'='*60}")
+    print(f"📊 Summary:")
+    print(f"  ⏱️ Median: {median:.1f}ms (min {min(timings):.1f}ms)")
+    print(f"  🎯 Budget: {IMPORT_BUDGET_MS:.0f}ms")
+    print(f"{'='*60}")
+
+    ok = True
+    if forbidden:
+        print(f"❌ Cold start imports {', '.join(forbidden[:5])}")
+        ok = False
+    if median > IMPORT_BUDGET_MS:
+        print(f"❌ Import time over budget by {median - IMPORT_BUDGET_MS:.1f}ms")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    try:
+        if not check_import_time():
+            exit(1)
+        print("\n✅ Import time within budget")
+    except Exception as e:
+        print(f"\n❌ Script failed with error: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
@@ -1,151 +1,104 @@
 import os
-import json
+import sys
 import asyncio
-from datetime import datetime, timedelta
-import redis.asyncio as redis
-import ssl
+from datetime import datetime
 
-REDIS_URL = os.getenv("REDIS_URL")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-print("🧹 Starting cleanup script...")
-print(f"📝 REDIS_URL exists: {bool(REDIS_URL)}")
+from plant_bot.cleanup import (
+    CLEANUP_DRY_RUN,
+    CLEANUP_MAX_OPS_PER_SECOND,
+    NEVER_WATERED,
+    NOT_WATERED,
+    PLANTS,
+    Cleanup,
+    delete_stale_plants,
+)
+from plant_bot.backends import STORAGE_BACKEND, get_backend
+from plant_bot.storage import PLANT_RETENTION
+
+# Print a progress line every this many SCAN pages
+CLEANUP_PROGRESS_PAGES = int(os.getenv("CLEANUP_PROGRESS_PAGES", "20"))
 
+print("🧹 Starting cleanup script...")
+print(f"📝 Storage backend: {STORAGE_BACKEND}")
 
-async def get_redis_client():
-    """Get Redis client with SSL support"""
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
 
-    if REDIS_URL and REDIS_URL.startswith("rediss://"):
-        print("🔒 Using SSL connection")
-        return redis.from_url(
-            REDIS_URL, encoding="utf-8", decode_responses=True, ssl=ssl_context
+def print_progress(stats):
+    if stats.pages % CLEANUP_PROGRESS_PAGES != 0:
+        return
+    if stats.phase == PLANTS:
+        print(
+            f"  📄 {stats.pages} pages, {stats.scanned} plants scanned, "
+            f"{stats.deleted} stale"
         )
     else:
-        print("🔓 Using non-SSL connection")
-        return redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
-
-
-async def delete_key(key):
-    """Delete key from Redis"""
-    client = None
-    try:
-        client = await get_redis_client()
-        result = await client.delete(key)
-        return result > 0
-    except Exception as e:
-        print(f"❌ Error deleting {key}: {e}")
-        return False
-    finally:
-        if client:
-            await client.close()
-
-
-async def get_from_redis(key):
-    """Get value from Redis"""
-    client = None
-    try:
-        client = await get_redis_client()
-        value = await client.get(key)
-        return value
-    except Exception as e:
-        print(f"❌ Error getting {key}: {e}")
-        return None
-    finally:
-        if client:
-            await client.close()
-
+        print(
+            f"  📄 {stats.pages} pages, {stats.index_scanned} {stats.phase} "
+            f"entries scanned, {stats.pruned} expired"
+        )
 
-async def get_keys(pattern):
-    """Get keys matching pattern from Redis"""
-    client = None
-    try:
-        client = await get_redis_client()
-        keys = await client.keys(pattern)
-        return keys
-    except Exception as e:
-        print(f"❌ Error getting keys: {e}")
-        return []
-    finally:
-        if client:
-            await client.close()
 
+async def cleanup_old_data(dry_run=CLEANUP_DRY_RUN):
+    """Remove plant data older than the retention period
 
-async def cleanup_old_data():
-    """Remove plant data older than 7 days"""
+    Redis plants expire on their own; this sweeps index entries they leave
+    behind and, once, deletes or sets an expiry on plants saved before that.
+    Other backends have their stale plants deleted here.
+    """
     print("=" * 60)
     print("🧹 Starting cleanup of old data...")
     print(f"⏰ Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
 
-    cutoff_date = datetime.now() - timedelta(days=7)
+    cutoff_date = datetime.now() - PLANT_RETENTION
     print(f"📅 Cutoff date: {cutoff_date.strftime('%Y-%m-%d %H:%M')}")
     print(f"ℹ️ Any data older than this will be deleted")
+    if dry_run:
+        print("🔍 Dry run - nothing will be deleted")
 
-    # Get all plant keys
-    keys = await get_keys("plant_bot:user:*")
-    print(f"\n🔍 Found {len(keys)} plant records to check")
-
-    deleted = 0
-    kept = 0
-
-    for key in keys:
-        plant_json = await get_from_redis(key)
-        if not plant_json:
-            continue
-
-        try:
-            plant = json.loads(plant_json)
-            last_watered_str = plant.get("last_watered")
-
-            # Decide whether to delete
-            should_delete = False
-            reason = ""
-
-            if not last_watered_str:
-                # Never watered - check creation date
-                created_at_str = plant.get("created_at")
-                if created_at_str:
-                    created_at = datetime.fromisoformat(created_at_str)
-                    if created_at < cutoff_date:
-                        should_delete = True
-                        days_old = (datetime.now() - created_at).days
-                        reason = f"created {days_old} days ago, never watered"
-            else:
-                # Has watering data - check last watered date
-                try:
-                    last_watered = datetime.fromisoformat(last_watered_str)
-                    if last_watered < cutoff_date:
-                        should_delete = True
-                        days_old = (datetime.now() - last_watered).days
-                        reason = f"last watered {days_old} days ago"
-                except ValueError:
-                    print(f"⚠️ Invalid date format in {key}: {last_watered_str}")
-
-            if should_delete:
-                username = plant.get("username", "Unknown")
-                plant_name = plant.get("plant_name", "Unknown")
-
-                if await delete_key(key):
-                    deleted += 1
-                    print(f"🗑️ Deleted: {plant_name} ({username}) - {reason}")
-                else:
-                    print(f"❌ Failed to delete: {key}")
+    backend = get_backend()
+    try:
+        async with backend.request_scope() as client:
+            if client is None:
+                stats = await delete_stale_plants(backend, cutoff_date, dry_run)
             else:
-                kept += 1
-                plant_name = plant.get("plant_name", "Unknown")
-                username = plant.get("username", "Unknown")
-                print(f"✅ Kept: {plant_name} ({username})")
+                if CLEANUP_MAX_OPS_PER_SECOND > 0:
+                    print(
+                        f"🐢 Limited to {CLEANUP_MAX_OPS_PER_SECOND:.0f} "
+                        "Redis commands/second"
+                    )
+                stats = await Cleanup(client, cutoff_date, dry_run=dry_run).run(
+                    on_page=print_progress
+                )
+    finally:
+        await backend.close()
 
-        except Exception as e:
-            print(f"⚠️ Error processing {key}: {e}")
+    if stats.resumed:
+        print(f"\n🔁 Resumed an interrupted run started at {stats.started_at}")
 
     print(f"\n{'='*60}")
-    print(f"📊 Cleanup Summary:")
-    print(f"  🗑️ Deleted: {deleted}")
-    print(f"  ✅ Kept: {kept}")
-    print(f"  📋 Total processed: {len(keys)}")
+    print(f"📊 Cleanup Summary{' (dry run)' if dry_run else ''}:")
+    print(f"  🗑️ {'Would delete' if dry_run else 'Deleted'}: {stats.deleted}")
+    print(f"    🌱 Never watered: {getattr(stats, NEVER_WATERED)}")
+    print(f"    💧 Not watered since cutoff: {getattr(stats, NOT_WATERED)}")
+    if stats.kept:
+        print(f"  ✅ Kept: {stats.kept}")
+    if stats.backfilled:
+        print(f"  ⏳ Expiry set on: {stats.backfilled}")
+    print(f"  📋 Plants processed: {stats.scanned}")
+    if stats.index_scanned:
+        print(
+            f"  🧽 {'Would prune' if dry_run else 'Pruned'} {stats.pruned} of "
+            f"{stats.index_scanned} index entries"
+        )
+    if stats.redis_ops:
+        print(
+            f"  ⚡ {stats.redis_ops} Redis commands in {stats.pages} pages, "
+            f"{stats.elapsed:.1f}s"
+        )
+    else:
+        print(f"  ⚡ {stats.pages} pages in {stats.elapsed:.1f}s")
     print(f"{'='*60}")
 
 
@@ -0,0 +1,45 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plant_bot.storage import (
+    REDIS_URL,
+    get_redis_client,
+    close_redis_pool,
+    CHAT_IDS_KEY,
+    migrate_legacy_chat_ids,
+)
+
+print("🔁 Starting chat ID migration...")
+print(f"📝 REDIS_URL exists: {bool(REDIS_URL)}")
+
+
+async def migrate_chat_ids():
+    """Move the legacy JSON chat ID list into the chat set"""
+    client = await get_redis_client()
+    try:
+        migrated = await migrate_legacy_chat_ids(client)
+        total = await client.scard(CHAT_IDS_KEY)
+    finally:
+        await client.aclose()
+        await close_redis_pool()
+
+    if migrated:
+        print(f"✅ Migrated {migrated} chat IDs")
+    else:
+        print("ℹ️ No legacy chat ID list found - nothing to migrate")
+    print(f"📊 {total} chats registered in {CHAT_IDS_KEY}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(migrate_chat_ids())
+        print("\n✅ Migration completed successfully")
+    except Exception as e:
+        print(f"\n❌ Migration failed with error: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,90 @@
+import os
+import sys
+import asyncio
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plant_bot.ratelimit import TokenBucket
+from plant_bot.storage import (
+    REDIS_URL,
+    get_redis_client,
+    close_redis_pool,
+    PLANT_FORMAT_VERSION,
+    convert_plant_page,
+)
+
+# SCAN pages per second; each costs at most three Redis commands
+MIGRATE_PAGES_PER_SECOND = float(os.getenv("MIGRATE_PAGES_PER_SECOND", "20"))
+MIGRATE_BATCH_SIZE = int(os.getenv("MIGRATE_BATCH_SIZE", "500"))
+MIGRATE_DRY_RUN = os.getenv("MIGRATE_DRY_RUN", "false") == "true"
+
+print("🔁 Starting plant format migration...")
+print(f"📝 REDIS_URL exists: {bool(REDIS_URL)}")
+
+
+async def migrate_plant_format(dry_run=MIGRATE_DRY_RUN):
+    """Rewrite legacy JSON plant records in the compact format, page by page
+
+    Safe to run while the bot is live and to run again: records written
+    meanwhile are skipped, and converted ones are not touched twice.
+    """
+    print("=" * 60)
+    print(f"🔁 Converting plants to format v{PLANT_FORMAT_VERSION}...")
+    print(f"⏰ Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if dry_run:
+        print("🔍 Dry run - nothing will be written")
+    print("=" * 60)
+
+    limiter = None
+    if MIGRATE_PAGES_PER_SECOND > 0:
+        limiter = TokenBucket(MIGRATE_PAGES_PER_SECOND)
+    totals = {"scanned": 0, "legacy": 0, "converted": 0, "unreadable": 0}
+    pages = 0
+
+    client = await get_redis_client()
+    try:
+        cursor = 0
+        while True:
+            if limiter is not None:
+                await limiter.acquire()
+            cursor, counts = await convert_plant_page(
+                client, cursor, MIGRATE_BATCH_SIZE, dry_run
+            )
+            for name, value in counts.items():
+                totals[name] += value
+            pages += 1
+            if pages % 20 == 0:
+                print(
+                    f"  📄 {pages} pages, {totals['scanned']} plants scanned, "
+                    f"{totals['converted']} converted"
+                )
+            if cursor == 0:
+                break
+    finally:
+        await client.aclose()
+        await close_redis_pool()
+
+    skipped = totals["legacy"] - totals["converted"]
+    print(f"\n{'='*60}")
+    print(f"📊 Migration Summary{' (dry run)' if dry_run else ''}:")
+    print(f"  📋 Plants scanned: {totals['scanned']}")
+    print(f"  📦 Legacy JSON records: {totals['legacy']}")
+    print(f"  ✅ Converted: {totals['converted']}")
+    if not dry_run and skipped:
+        print(f"  ⏭️ Changed while converting, left for the next run: {skipped}")
+    if totals["unreadable"]:
+        print(f"  ⚠️ Unreadable: {totals['unreadable']}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(migrate_plant_format())
+        print("\n✅ Migration completed successfully")
+    except Exception as e:
+        print(f"\n❌ Migration failed with error: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
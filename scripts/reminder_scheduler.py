@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import signal
+import asyncio
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plant_bot.broadcast import Broadcaster, create_bot
+from plant_bot.reminders import ChatReminders, load_greetings
+from plant_bot.storage import (
+    REDIS_URL,
+    get_redis_client,
+    close_redis_pool,
+    REMINDERS_KEY,
+    REMINDER_REPEAT,
+    ensure_reminder_queue,
+    iter_chat_batches,
+    migrate_legacy_chat_ids,
+    next_reminder_time,
+    pop_due_reminders,
+    reschedule_reminders,
+)
+
+BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Reminders handled per wake-up; a full batch means more may be waiting
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "50"))
+# Upper bound on sleeping, so newly scheduled earlier reminders are noticed
+SCHEDULER_MAX_SLEEP = float(os.getenv("SCHEDULER_MAX_SLEEP", "300"))
+
+print("⏰ Starting reminder scheduler...")
+print(f"📝 BOT_TOKEN exists: {bool(BOT_TOKEN)}")
+print(f"📝 REDIS_URL exists: {bool(REDIS_URL)}")
+
+
+async def fire_due_reminders(client, bot, greetings):
+    """Send the reminders that are due; returns how many plants were due"""
+    due = await pop_due_reminders(client, limit=SCHEDULER_BATCH_SIZE)
+    if not due:
+        return 0
+
+    needy = ChatReminders(greetings)
+    for user_id, plant, _ in due:
+        try:
+            needy.add(plant)
+        except Exception as e:
+            print(f"❌ Error processing plant {user_id}: {e}")
+
+    if needy.plants:
+        report = await Broadcaster(bot).run(needy.messages(iter_chat_batches(client)))
+        print(
+            f"📤 Reminded about {needy.plants} plants: "
+            f"{report['sent']} sent, {report['failed']} failed"
+        )
+
+    # Nag again later unless /watered moves the reminder first
+    fire_at = (datetime.now() + REMINDER_REPEAT).timestamp()
+    await reschedule_reminders(
+        client, [(user_id, score) for user_id, _, score in due], fire_at
+    )
+    return len(due)
+
+
+async def run_scheduler():
+    """Sleep until the next reminder is due, send it, repeat"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    greetings = load_greetings()
+    client = await get_redis_client()
+    try:
+        # Data written before the reminder queue existed
+        await migrate_legacy_chat_ids(client)
+        seeded = await ensure_reminder_queue(client)
+        if seeded:
+            print(f"🗂️ Seeded reminder queue with {seeded} plants")
+
+        async with create_bot(BOT_TOKEN) as bot:
+            while not stop.is_set():
+                enabled = await client.get(REMINDERS_KEY) != "false"
+                if enabled:
+                    # Overdue reminders (e.g. after downtime) go out first
+                    fired = await fire_due_reminders(client, bot, greetings)
+                    if fired == SCHEDULER_BATCH_SIZE:
+                        continue
+
+                delay = SCHEDULER_MAX_SLEEP
+                next_at = await next_reminder_time(client)
+                if enabled and next_at is not None:
+                    delay = min(max(next_at - time.time(), 0), SCHEDULER_MAX_SLEEP)
+                print(f"😴 Sleeping {delay:.0f}s")
+
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        await client.aclose()
+        await close_redis_pool()
+
+    print("👋 Scheduler stopped")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_scheduler())
+    except Exception as e:
+        print(f"\n❌ Scheduler failed with error: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,174 @@
+import os
+import sys
+import signal
+import time
+import socket
+import asyncio
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import webhook
+from plant_bot.ordering import chat_id_of
+from plant_bot.storage import (
+    ensure_group,
+    read_updates,
+    claim_stale_updates,
+    ack_updates,
+)
+
+WORKER_NAME = os.getenv("WORKER_NAME", f"{socket.gethostname()}-{os.getpid()}")
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "50"))
+WORKER_BLOCK_MS = int(os.getenv("WORKER_BLOCK_MS", "5000"))
+# Pending updates idle this long belong to a crashed worker and are taken over
+WORKER_CLAIM_IDLE_MS = int(os.getenv("WORKER_CLAIM_IDLE_MS", "60000"))
+# Seconds between reclaims while the stream is busy; an idle worker
+# reclaims whenever a read comes back empty
+WORKER_RECLAIM_INTERVAL = float(os.getenv("WORKER_RECLAIM_INTERVAL", "30"))
+# Updates that failed this many times are dropped instead of retried
+WORKER_MAX_DELIVERIES = int(os.getenv("WORKER_MAX_DELIVERIES", "5"))
+
+print(f"👷 Starting update worker {WORKER_NAME}...")
+
+
+# Entry IDs left pending behind a failed update, per chat, oldest first.
+# Newer updates from those chats wait behind them so the chat stays in order.
+held = {}
+
+
+def stream_order(entry_id):
+    """Sort key putting stream entry IDs in the order they were added"""
+    ms, seq = entry_id.split("-")
+    return int(ms), int(seq)
+
+
+def release_held(entry_ids):
+    """Stop holding chats behind updates that were dropped"""
+    for chat_id in list(held):
+        held[chat_id] = [e for e in held[chat_id] if e not in entry_ids]
+        if not held[chat_id]:
+            del held[chat_id]
+
+
+async def process_chat(updates):
+    """Process one chat's updates in order, stopping at the first failure
+
+    Returns the entry IDs that succeeded. The failed update and the ones
+    after it stay pending, so they are retried in order.
+    """
+    done = []
+    for entry_id, update_data in updates:
+        try:
+            await webhook.process_update(update_data, webhook_reply=False)
+        except Exception as e:
+            print(f"❌ Failed update {update_data.get('update_id')}: {e}")
+            break
+        done.append(entry_id)
+    return done
+
+
+async def process_batch(client, entries):
+    """Process a batch concurrently across chats, in order within a chat
+
+    A chat only runs if nothing of it is held, or its oldest held update
+    is the first in the batch (a reclaim retrying it).
+    """
+    by_chat = defaultdict(list)
+    for entry_id, update_data in sorted(entries, key=lambda e: stream_order(e[0])):
+        by_chat[chat_id_of(update_data)].append((entry_id, update_data))
+
+    runnable = {
+        chat_id: updates
+        for chat_id, updates in by_chat.items()
+        if chat_id not in held or held[chat_id][0] == updates[0][0]
+    }
+    results = await asyncio.gather(
+        *(process_chat(updates) for updates in runnable.values())
+    )
+    done = {entry_id for chat_done in results for entry_id in chat_done}
+
+    for chat_id, updates in by_chat.items():
+        pending = set(held.get(chat_id, ())) | {entry_id for entry_id, _ in updates}
+        pending -= done
+        if pending:
+            held[chat_id] = sorted(pending, key=stream_order)
+        else:
+            held.pop(chat_id, None)
+
+    await ack_updates(client, list(done))
+    return len(done)
+
+
+async def reclaim(client):
+    """Take over updates abandoned by other workers"""
+    claimed = await claim_stale_updates(
+        client, WORKER_NAME, WORKER_CLAIM_IDLE_MS, WORKER_BATCH_SIZE
+    )
+    if not claimed:
+        return 0
+
+    entries = []
+    dead = []
+    for entry_id, update_data, deliveries in claimed:
+        if deliveries > WORKER_MAX_DELIVERIES:
+            dead.append(entry_id)
+            print(
+                f"🪦 Dropping update {update_data.get('update_id')} "
+                f"after {deliveries} deliveries"
+            )
+        else:
+            entries.append((entry_id, update_data))
+
+    release_held(dead)
+    await ack_updates(client, dead)
+    print(f"♻️ Reclaimed {len(entries)} pending updates")
+    return await process_batch(client, entries)
+
+
+async def run_worker():
+    """Read updates from the stream in batches until stopped"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    processed = 0
+    try:
+        async with webhook.data_manager.request_scope() as client:
+            if client is None:
+                raise RuntimeError("The update worker needs the Redis backend")
+            await ensure_group(client)
+            await webhook.get_application()
+            processed += await reclaim(client)
+            reclaimed_at = time.monotonic()
+
+            while not stop.is_set():
+                entries = await read_updates(
+                    client, WORKER_NAME, WORKER_BATCH_SIZE, WORKER_BLOCK_MS
+                )
+                if entries:
+                    processed += await process_batch(client, entries)
+                    print(f"✅ Processed {len(entries)} updates ({processed} total)")
+                # Held chats only move on once their failed update is
+                # reclaimed, so a busy stream must not put that off forever
+                if (
+                    not entries
+                    or time.monotonic() - reclaimed_at >= WORKER_RECLAIM_INTERVAL
+                ):
+                    processed += await reclaim(client)
+                    reclaimed_at = time.monotonic()
+    finally:
+        await webhook.close_resources()
+
+    print(f"👋 Worker stopped after {processed} updates")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_worker())
+    except Exception as e:
+        print(f"\n❌ Worker failed with error: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+# A Redis server to run the tests on instead of fakeredis. It is flushed
+# before every test, so never point this at real data.
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def redis_pool():
+    """Connection pool on an empty Redis, fakeredis unless TEST_REDIS_URL is set"""
+    import redis.asyncio as redis
+
+    if TEST_REDIS_URL:
+        from plant_bot.storage import create_redis_pool
+
+        pool = create_redis_pool(TEST_REDIS_URL)
+    else:
+        from fakeredis import FakeServer
+        from fakeredis.aioredis import FakeConnection
+
+        pool = redis.ConnectionPool(
+            connection_class=FakeConnection,
+            server=FakeServer(),
+            encoding="utf-8",
+            decode_responses=True,
+        )
+    client = redis.Redis(connection_pool=pool)
+    await client.flushdb()
+    await client.aclose()
+    yield pool
+    await pool.disconnect()
+
+
+@pytest.fixture
+async def redis_client(redis_pool):
+    import redis.asyncio as redis
+
+    client = redis.Redis(connection_pool=redis_pool)
+    yield client
+    await client.aclose()
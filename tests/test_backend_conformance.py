@@ -0,0 +1,217 @@
+"""Behaviour every storage backend must share, run on each backend"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from plant_bot.backends.redis_backend import RedisBackend
+from plant_bot.backends.sqlite_backend import SqliteBackend
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=["redis", "sqlite"])
+async def backend(request, redis_pool, tmp_path):
+    """A backend on empty storage"""
+    if request.param == "redis":
+        backend = RedisBackend(redis_pool)
+    else:
+        backend = SqliteBackend(str(tmp_path / "plant_bot.db"))
+    yield backend
+    await backend.close()
+
+
+def days_ago(days, now):
+    return int((now - timedelta(days=days)).timestamp())
+
+
+def plant(name, now, watered_days=None, created_days=0, chat_id=None):
+    return {
+        "username": name,
+        "plant_name": f"{name}'s Plant",
+        "last_watered": None if watered_days is None else days_ago(watered_days, now),
+        "watered_by": None if watered_days is None else name,
+        "created_at": days_ago(created_days, now),
+        "chat_id": chat_id,
+    }
+
+
+async def test_missing_plant(backend):
+    assert await backend.get_plant(1) is None
+    assert [p async for p in backend.iter_plants()] == []
+    assert await backend.get_status_page(0, 10) == ({}, 0)
+
+
+async def test_ensure_plant_creates_once(backend):
+    first, created = await backend.ensure_plant(1, "ann", -100)
+    assert created
+    assert first["plant_name"] == "ann's Plant"
+    assert first["last_watered"] is None and first["watered_by"] is None
+    assert first["chat_id"] == "-100"
+    again, created = await backend.ensure_plant(1, "someone else", -200)
+    assert not created
+    assert again["username"] == "ann"
+    # The chat is recorded even for an existing plant
+    assert again["chat_id"] == "-200"
+    assert await backend.get_plant(1) == again
+
+
+async def test_mark_watered_updates_plant(backend):
+    await backend.ensure_plant(1, "ann")
+    await backend.rename_plant(1, "ann", "Fern")
+    now = datetime.now().replace(microsecond=0)
+    watered = await backend.mark_watered(1, "bob", -100, now=now)
+    assert watered["last_watered"] == int(now.timestamp())
+    assert watered["username"] == "bob" and watered["watered_by"] == "bob"
+    assert watered["plant_name"] == "Fern"
+    assert watered["chat_id"] == "-100"
+    assert await backend.get_plant(1) == watered
+
+
+async def test_writes_create_missing_plants(backend):
+    watered = await backend.mark_watered(1, "ann")
+    assert watered["created_at"] and watered["last_watered"]
+    renamed = await backend.rename_plant(2, "bob", "Cactus", -5)
+    assert renamed["plant_name"] == "Cactus" and renamed["last_watered"] is None
+    assert renamed["chat_id"] == "-5"
+    user_ids = [user_id async for user_id, _ in backend.iter_plants()]
+    assert sorted(user_ids) == ["1", "2"]
+
+
+async def test_save_plants_round_trip(backend):
+    now = datetime.now()
+    plants = {
+        "1": plant("ann", now, watered_days=1, chat_id="-100"),
+        "2": plant("bob", now),
+    }
+    await backend.save_plants(plants)
+    assert await backend.get_plant("1") == plants["1"]
+    assert await backend.get_plant(2) == plants["2"]
+    assert dict([p async for p in backend.iter_plants()]) == plants
+
+
+async def test_due_plants_are_most_overdue_first(backend):
+    now = datetime.now()
+    await backend.save_plants(
+        {
+            "fresh": plant("a", now, watered_days=1),
+            "due": plant("b", now, watered_days=4),
+            "overdue": plant("c", now, watered_days=6),
+            "never": plant("d", now, created_days=5),
+        }
+    )
+    # Never watered plants are due from the moment they are created
+    due = [user_id async for user_id, _ in backend.iter_due_plants(now)]
+    assert due == ["never", "overdue", "due"], due
+    # Plants watered since become due later
+    await backend.mark_watered("due", "b", now=now)
+    due = [user_id async for user_id, _ in backend.iter_due_plants(now)]
+    assert due == ["never", "overdue"], due
+
+
+async def test_stale_plants_and_deletion(backend):
+    now = datetime.now()
+    await backend.save_plants(
+        {
+            "fresh": plant("a", now, watered_days=1, created_days=6),
+            "stale": plant("b", now, watered_days=5),
+            "never": plant("c", now, created_days=5),
+            "new": plant("d", now, created_days=1),
+        }
+    )
+    cutoff = now - timedelta(days=3)
+    stale = sorted([user_id async for user_id, _ in backend.iter_stale_plants(cutoff)])
+    assert stale == ["never", "stale"], stale
+    assert await backend.delete_plants(stale + ["missing"]) == 2
+    assert await backend.get_plant("stale") is None
+    assert [p async for p in backend.iter_stale_plants(cutoff)] == []
+    due = [user_id async for user_id, _ in backend.iter_due_plants(now)]
+    assert due == ["new"], due
+    plants, total = await backend.get_status_page(0, 10)
+    assert sorted(plants) == ["fresh", "new"] and total == 2
+
+
+async def test_status_pages(backend):
+    now = datetime.now()
+    await backend.save_plants(
+        {str(i): plant(f"u{i}", now, watered_days=i / 2) for i in range(1, 6)}
+    )
+    first, total = await backend.get_status_page(0, 2)
+    assert total == 5
+    assert list(first) == ["5", "4"], list(first)
+    last, total = await backend.get_status_page(4, 2)
+    assert list(last) == ["1"] and total == 5
+    assert await backend.get_status_page(10, 2) == ({}, 5)
+
+
+async def test_chats(backend):
+    assert await backend.add_chat(-100)
+    assert not await backend.add_chat(-100)
+    assert await backend.is_chat_registered(-100)
+    assert not await backend.is_chat_registered(-200)
+    chat_ids = [-i for i in range(1, 1201)]
+    for chat_id in chat_ids:
+        await backend.add_chat(chat_id)
+    seen = set()
+    async for batch in backend.iter_chat_batches(batch_size=500):
+        assert all(isinstance(chat_id, int) for chat_id in batch)
+        seen.update(batch)
+    assert seen == set(chat_ids) | {-100}
+
+
+async def test_reminders_setting(backend):
+    assert await backend.get_reminders_enabled()
+    await backend.set_reminders_enabled(False)
+    assert not await backend.get_reminders_enabled()
+    await backend.set_reminders_enabled(True)
+    assert await backend.get_reminders_enabled()
+
+
+async def test_update_claims_and_data_version(backend):
+    first, version = await backend.claim_update(1, 60)
+    assert first
+    assert isinstance(version, int)
+    assert not (await backend.claim_update(1, 60))[0]
+    await backend.release_update(1)
+    assert (await backend.claim_update(1, 60))[0]
+
+    # Every write /status could show moves the version
+    for write in (
+        backend.ensure_plant(1, "ann"),
+        backend.mark_watered(1, "ann"),
+        backend.rename_plant(1, "ann", "Fern"),
+        backend.save_plants({"2": plant("bob", datetime.now())}),
+        backend.set_reminders_enabled(False),
+        backend.delete_plants(["2"]),
+    ):
+        await write
+        _, newer = await backend.claim_update(2, 60)
+        assert newer > version, (newer, version)
+        version = newer
+        await backend.release_update(2)
+
+
+async def test_update_replies(backend):
+    reply = {"method": "sendMessage", "chat_id": 1, "text": "hi"}
+    await backend.claim_update(1, 60)
+    assert await backend.save_update_reply(1, reply)
+    assert await backend.get_update_reply(1) == reply
+
+    # A retry while the update is processed means the response is dropped
+    await backend.claim_update(2, 60)
+    assert await backend.get_update_reply(2) is None
+    assert not await backend.save_update_reply(2, reply)
+
+    await backend.release_update(1)
+    assert await backend.get_update_reply(1) is None
+
+
+async def test_snapshots_are_optional(backend):
+    snapshot, version = await backend.get_status_snapshot(0)
+    assert snapshot is None
+    if version is not None:
+        stored = await backend.store_status_snapshot(
+            0, version, {"text": "page", "total": 0}, timedelta(minutes=1)
+        )
+        snapshot, _ = await backend.get_status_snapshot(0)
+        assert snapshot is None or (stored and snapshot["text"] == "page")
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from telegram.error import ChatMigrated, Forbidden, TelegramError
+
+from plant_bot.broadcast import Broadcaster
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeBot:
+    """Records sent messages; raises the error mapped to a chat instead"""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        error = self.errors.get(chat_id)
+        if error is not None:
+            raise error
+        self.sent.append(chat_id)
+
+
+def broadcaster(bot, concurrency=2):
+    return Broadcaster(bot, concurrency=concurrency, rate=10_000, per_chat_interval=0)
+
+
+async def test_unlisted_errors_fail_only_their_chat():
+    bot = FakeBot(
+        {
+            1: TelegramError("Conflict"),
+            2: Forbidden("bot was blocked"),
+            3: RuntimeError("unexpected"),
+        }
+    )
+    # More messages than workers and queue slots together
+    messages = [(chat_id, "hi") for chat_id in range(1, 21)]
+    report = await asyncio.wait_for(broadcaster(bot).run(messages), 5)
+
+    assert report["sent"] == 17
+    assert report["failed"] == 3
+    assert report["outcomes"][1] == "failed: Conflict"
+    assert report["outcomes"][3] == "failed: unexpected"
+    assert sorted(bot.sent) == list(range(4, 21))
+
+
+async def test_migrated_chat_is_sent_to_its_new_id():
+    bot = FakeBot({-1: ChatMigrated(-1001)})
+    report = await broadcaster(bot).run([(-1, "hi")])
+    assert report["outcomes"] == {-1: "sent"}
+    assert report["migrated"] == {-1: -1001}
+    assert bot.sent == [-1001]
+
+
+async def test_run_does_not_hang_when_every_worker_dies():
+    sender = broadcaster(FakeBot(), concurrency=1)
+
+    async def dead_worker(queue):
+        raise RuntimeError("worker crashed")
+
+    sender._worker = dead_worker
+    with pytest.raises(RuntimeError, match="workers stopped"):
+        await asyncio.wait_for(sender.run([(i, "hi") for i in range(10)]), 5)
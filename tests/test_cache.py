@@ -0,0 +1,64 @@
+from plant_bot.cache import MISSING, VersionedCache
+
+
+def test_untrusted_until_synced():
+    cache = VersionedCache(10, 60)
+    cache.set("a", 1)
+    assert cache.get("a") is MISSING
+    cache.sync(5)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+
+def test_own_writes_keep_entries():
+    cache = VersionedCache(10, 60)
+    cache.sync(5)
+    cache.wrote()
+    cache.set("a", 1)
+    cache.sync(6)
+    assert cache.get("a") == 1
+
+
+def test_other_writes_drop_entries():
+    cache = VersionedCache(10, 60)
+    cache.sync(5)
+    cache.set("a", 1)
+    cache.sync(7)
+    assert cache.get("a") is MISSING
+
+
+def test_invalidate():
+    cache = VersionedCache(10, 60)
+    cache.sync(5)
+    cache.set("a", 1)
+    cache.invalidate()
+    assert cache.get("a") is MISSING
+    cache.sync(5)
+    assert cache.get("a") is MISSING
+
+
+def test_ttl_expires_entries():
+    cache = VersionedCache(10, -1)
+    cache.sync(1)
+    cache.set("a", 1)
+    assert cache.get("a") is MISSING
+
+
+def test_least_recently_used_is_evicted():
+    cache = VersionedCache(2, 60)
+    cache.sync(1)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["size"] == 2
+
+
+def test_disabled_cache_stores_nothing():
+    cache = VersionedCache(0, 60)
+    cache.sync(1)
+    cache.set("a", 1)
+    assert not cache.enabled
+    assert cache.get("a") is MISSING
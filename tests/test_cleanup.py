@@ -0,0 +1,145 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from plant_bot import cleanup as cleanup_module
+from plant_bot.cleanup import Cleanup
+from plant_bot.storage import (
+    CLEANUP_CHECKPOINT_KEY,
+    DUE_INDEX_KEY,
+    REMINDER_QUEUE_KEY,
+    RETENTION_BACKFILLED_KEY,
+    encode_plant,
+    load_cleanup_checkpoint,
+    plant_key,
+)
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime.now()
+OLD = NOW - timedelta(days=30)
+RECENT = NOW - timedelta(days=1)
+
+# user_id -> (legacy JSON record?, last_watered, created_at)
+PLANTS = {
+    "1": (True, None, OLD),
+    "2": (True, OLD, OLD),
+    "3": (True, RECENT, OLD),
+    "4": (False, None, OLD),
+    "5": (False, OLD, OLD),
+    "6": (False, None, RECENT),
+}
+STALE = ["1", "2", "4", "5"]
+KEPT = ["3", "6"]
+
+
+def record(legacy, last_watered, created_at):
+    if legacy:
+        return json.dumps(
+            {
+                "username": "ann",
+                "plant_name": "Fern",
+                "last_watered": last_watered and last_watered.isoformat(),
+                "watered_by": "ann" if last_watered else None,
+                "created_at": created_at.isoformat(),
+            }
+        )
+    return encode_plant(
+        {
+            "username": "ann",
+            "plant_name": "Fern",
+            "last_watered": last_watered and int(last_watered.timestamp()),
+            "created_at": int(created_at.timestamp()),
+            "chat_id": "-100",
+        }
+    )
+
+
+@pytest.fixture
+async def plants(redis_client):
+    """Legacy and v2 plants without expiry, plus an orphaned index entry"""
+    for user_id, fields in PLANTS.items():
+        await redis_client.set(plant_key(user_id), record(*fields))
+    user_ids = [*PLANTS, "99"]
+    await redis_client.zadd(DUE_INDEX_KEY, dict.fromkeys(user_ids, 0))
+    await redis_client.zadd(REMINDER_QUEUE_KEY, dict.fromkeys(user_ids, 0))
+    return redis_client
+
+
+def cleanup(client, **kwargs):
+    return Cleanup(client, max_ops_per_second=0, **kwargs)
+
+
+async def dump(client):
+    return {
+        key: (await client.dump(key), await client.ttl(key))
+        for key in await client.keys("*")
+    }
+
+
+async def test_deletes_stale_and_backfills_kept_plants(plants):
+    stats = await cleanup(plants).run()
+
+    assert stats.scanned == 6
+    assert stats.deleted == 4
+    assert (stats.never_watered, stats.not_watered) == (2, 2)
+    assert stats.kept == stats.backfilled == 2
+    assert stats.pruned == 2
+    for user_id in STALE:
+        assert not await plants.exists(plant_key(user_id))
+    for user_id in KEPT:
+        assert await plants.ttl(plant_key(user_id)) > 0
+    assert sorted(await plants.zrange(DUE_INDEX_KEY, 0, -1)) == KEPT
+    assert sorted(await plants.zrange(REMINDER_QUEUE_KEY, 0, -1)) == KEPT
+
+    # A full pass leaves no checkpoint, and later runs skip the plant keys
+    assert not await plants.exists(CLEANUP_CHECKPOINT_KEY)
+    assert await plants.exists(RETENTION_BACKFILLED_KEY)
+    stats = await cleanup(plants).run()
+    assert (stats.scanned, stats.index_scanned, stats.deleted) == (0, 4, 0)
+
+
+async def test_dry_run_writes_nothing(plants):
+    before = await dump(plants)
+    stats = await cleanup(plants, dry_run=True, batch_size=2).run()
+
+    assert (stats.deleted, stats.kept) == (4, 2)
+    assert stats.backfilled == 0
+    assert await dump(plants) == before
+
+
+async def test_resumes_from_the_saved_checkpoint(plants, monkeypatch):
+    class Interrupted(Exception):
+        pass
+
+    def interrupt(stats):
+        # SCAN pages can hold only index keys
+        if stats.scanned:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        await cleanup(plants, batch_size=2).run(on_page=interrupt)
+    checkpoint = await load_cleanup_checkpoint(plants)
+    assert checkpoint["phase"] == "plants"
+    assert checkpoint["cursor"] != "0"
+    assert 0 < int(checkpoint["scanned"]) < 6
+
+    cursors = []
+    scan = cleanup_module.scan_plant_page
+
+    async def scan_plant_page(client, cursor, batch_size):
+        cursors.append(cursor)
+        return await scan(client, cursor, batch_size)
+
+    monkeypatch.setattr(cleanup_module, "scan_plant_page", scan_plant_page)
+    stats = await cleanup(plants, batch_size=2).run()
+
+    assert stats.resumed
+    assert cursors[0] == int(checkpoint["cursor"])
+    # Totals carry over; a restart from cursor 0 would count plants twice
+    assert stats.scanned == 6
+    assert stats.deleted == 4
+    for user_id in STALE:
+        assert not await plants.exists(plant_key(user_id))
+    assert not await plants.exists(CLEANUP_CHECKPOINT_KEY)
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from plant_bot.storage.codec import decode_plant, encode_plant, is_legacy_record
+
+PLANT = {
+    "username": "ann",
+    "plant_name": "Fern",
+    "last_watered": 1733000000,
+    "watered_by": "ann",
+    "created_at": 1732000000,
+    "chat_id": "-100",
+}
+
+
+def test_round_trip():
+    raw = encode_plant(PLANT)
+    assert not is_legacy_record(raw)
+    assert decode_plant(raw) == PLANT
+
+
+def test_round_trip_never_watered_without_chat():
+    plant = {**PLANT, "last_watered": None, "watered_by": None, "chat_id": None}
+    assert decode_plant(encode_plant(plant)) == plant
+
+
+def test_separators_in_user_text_are_replaced():
+    plant = {**PLANT, "plant_name": "a\x1fb\nc", "username": "x\x1fy"}
+    decoded = decode_plant(encode_plant(plant))
+    assert decoded["plant_name"] == "a b c"
+    assert decoded["username"] == "x y"
+    assert decoded["chat_id"] == "-100"
+
+
+def test_legacy_json_is_read_with_epoch_times():
+    raw = json.dumps(
+        {
+            "username": "ann",
+            "plant_name": "Fern",
+            "last_watered": "2024-12-01T10:00:00",
+            "watered_by": "ann",
+            "created_at": 1732000000,
+        }
+    )
+    assert is_legacy_record(raw)
+    plant = decode_plant(raw)
+    assert isinstance(plant["last_watered"], int)
+    assert plant["created_at"] == 1732000000
+
+
+def test_unreadable_record_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_plant("not a plant")
@@ -0,0 +1,73 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from plant_bot.storage import (
+    DUE_INDEX_KEY,
+    REMINDER_QUEUE_KEY,
+    WATERING_INTERVAL,
+    due_score,
+    ensure_due_index,
+    ensure_reminder_queue,
+    get_status_page,
+    iter_due_plants,
+    mark_watered,
+    plant_key,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def test_due_score():
+    watered = {"last_watered": 1000, "created_at": 10}
+    assert due_score(watered) == 1000 + WATERING_INTERVAL.total_seconds()
+    assert due_score({"last_watered": None, "created_at": 10}) == 10
+    assert due_score({}) == 0
+
+
+async def save_legacy_plants(client, count):
+    """JSON plants as saved before the due index existed, due 2 days ago"""
+    watered = (datetime.now() - timedelta(days=5)).isoformat()
+    for user_id in range(count):
+        plant = {
+            "username": f"user{user_id}",
+            "plant_name": "Fern",
+            "last_watered": watered,
+            "watered_by": f"user{user_id}",
+            "created_at": watered,
+        }
+        await client.set(plant_key(user_id), json.dumps(plant))
+
+
+async def test_backfill_survives_a_write_before_it(redis_client):
+    await save_legacy_plants(redis_client, 5)
+    # The first command after a deploy creates the index key
+    await mark_watered(redis_client, 99, "new")
+    assert await redis_client.zcard(DUE_INDEX_KEY) == 1
+
+    assert await ensure_due_index(redis_client) == 5
+    due = [user_id async for user_id, _ in iter_due_plants(redis_client)]
+    assert sorted(due) == ["0", "1", "2", "3", "4"]
+    assert (await get_status_page(redis_client, 0, 10))[1] == 6
+    # Done once
+    assert await ensure_due_index(redis_client) == 0
+
+
+async def test_backfill_keeps_scores_written_meanwhile(redis_client):
+    await save_legacy_plants(redis_client, 1)
+    now = datetime.now()
+    await redis_client.zadd(DUE_INDEX_KEY, {"0": now.timestamp()})
+    await ensure_due_index(redis_client)
+    assert await redis_client.zscore(DUE_INDEX_KEY, "0") == now.timestamp()
+
+
+async def test_reminder_queue_seeding_survives_a_write_before_it(redis_client):
+    await save_legacy_plants(redis_client, 3)
+    await mark_watered(redis_client, 99, "new")
+    scheduled = await redis_client.zscore(REMINDER_QUEUE_KEY, "99")
+
+    assert await ensure_reminder_queue(redis_client) == 3
+    assert await redis_client.zcard(REMINDER_QUEUE_KEY) == 4
+    assert await redis_client.zscore(REMINDER_QUEUE_KEY, "99") == scheduled
+    assert await ensure_reminder_queue(redis_client) == 0
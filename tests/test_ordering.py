@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from plant_bot.ordering import KeyedSerializer, chat_id_of
+
+pytestmark = pytest.mark.anyio
+
+
+def test_chat_id_of():
+    assert chat_id_of({"message": {"chat": {"id": 5}}}) == 5
+    assert chat_id_of({"callback_query": {"message": {"chat": {"id": 6}}}}) == 6
+    assert chat_id_of({"inline_query": {}}) is None
+
+
+async def test_same_key_runs_in_arrival_order():
+    serializer = KeyedSerializer()
+    events = []
+
+    async def call(name, delay):
+        events.append(f"start {name}")
+        await asyncio.sleep(delay)
+        events.append(f"end {name}")
+
+    await asyncio.gather(
+        serializer.run("chat", call, "first", 0.02),
+        serializer.run("chat", call, "second", 0),
+    )
+    assert events == ["start first", "end first", "start second", "end second"]
+    assert len(serializer) == 0
+
+
+async def test_different_keys_run_concurrently():
+    serializer = KeyedSerializer()
+    started = asyncio.Event()
+
+    async def waiter():
+        await asyncio.wait_for(started.wait(), 1)
+
+    async def starter():
+        started.set()
+
+    await asyncio.gather(serializer.run("a", waiter), serializer.run("b", starter))
+
+
+async def test_none_key_is_not_serialized():
+    serializer = KeyedSerializer()
+
+    async def call():
+        return len(serializer)
+
+    assert await serializer.run(None, call) == 0
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api import webhook
+from plant_bot.backends.redis_backend import RedisBackend
+from plant_bot.storage import (
+    DUE_INDEX_KEY,
+    STATUS_SNAPSHOT_MAX_TTL,
+    due_score,
+    encode_plant,
+    new_plant,
+    plant_key,
+    status_snapshot_key,
+    store_status_snapshot,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def data_manager(redis_pool):
+    return webhook.DataManager(RedisBackend(redis_pool))
+
+
+async def test_watering_replaces_the_snapshot(data_manager, redis_client):
+    await data_manager.backend.save_plants({"1": new_plant("ann")})
+    text, _, _ = await data_manager.get_status_page()
+    assert "Never watered" in text
+    assert await redis_client.exists(status_snapshot_key(0))
+
+    await data_manager.mark_watered(1, "ann")
+    text, _, _ = await data_manager.get_status_page()
+    assert "Never watered" not in text
+    assert "0 days ago" in text
+
+
+async def test_snapshot_of_an_expired_plant_lives_briefly(data_manager, redis_client):
+    # Written before plants had an expiry, and past it already
+    plant = new_plant("ann", datetime.now() - timedelta(days=30))
+    await redis_client.set(plant_key(1), encode_plant(plant))
+    await redis_client.zadd(DUE_INDEX_KEY, {"1": due_score(plant)})
+
+    text, _, _ = await data_manager.get_status_page()
+    assert "ann" in text
+    assert 0 < await redis_client.pttl(status_snapshot_key(0)) <= 1000
+
+
+async def test_snapshot_ttl_is_capped(redis_client):
+    assert await store_status_snapshot(
+        redis_client, 0, "0", {"text": "page", "total": 0}, timedelta(days=30)
+    )
+    ttl = await redis_client.pttl(status_snapshot_key(0))
+    assert 0 < ttl <= STATUS_SNAPSHOT_MAX_TTL.total_seconds() * 1000
+
+
+async def test_page_past_the_end_moves_to_the_last_page(data_manager, monkeypatch):
+    monkeypatch.setattr(webhook, "STATUS_PAGE_SIZE", 2)
+    await data_manager.backend.save_plants(
+        {str(user_id): new_plant(f"user{user_id}") for user_id in range(5)}
+    )
+    text, offset, total = await data_manager.get_status_page(4)
+    assert (offset, total) == (4, 5)
+    assert "(5-5 of 5)" in text
+
+    # Plants deleted after the page buttons were sent
+    await data_manager.backend.delete_plants(["0", "1"])
+    text, offset, total = await data_manager.get_status_page(4)
+    assert (offset, total) == (2, 3)
+    assert "(3-3 of 3)" in text
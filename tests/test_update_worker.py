@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from plant_bot.backends.redis_backend import RedisBackend
+from plant_bot.storage import (
+    UPDATE_GROUP,
+    UPDATE_STREAM_KEY,
+    enqueue_update,
+    ensure_group,
+    read_updates,
+)
+from scripts import update_worker as worker
+
+pytestmark = pytest.mark.anyio
+
+
+def update(update_id, chat_id):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}}}
+
+
+@pytest.fixture
+def processed(redis_client, monkeypatch):
+    """Update IDs processed in order; update 1 fails the first time"""
+    processed = []
+    failing = {1}
+
+    async def process_update(update_data, webhook_reply=True):
+        update_id = update_data["update_id"]
+        if update_id in failing:
+            failing.discard(update_id)
+            raise RuntimeError("boom")
+        processed.append(update_id)
+
+    monkeypatch.setattr(worker.webhook, "process_update", process_update)
+    monkeypatch.setattr(worker, "held", {})
+    monkeypatch.setattr(worker, "WORKER_CLAIM_IDLE_MS", 0)
+    return processed
+
+
+async def read(client):
+    return await read_updates(client, worker.WORKER_NAME, 50, 10)
+
+
+async def test_held_chat_resumes_in_order_on_reclaim(redis_client, processed):
+    await ensure_group(redis_client)
+    for update_id, chat_id in [(1, 1), (2, 1), (3, 2)]:
+        await enqueue_update(redis_client, update(update_id, chat_id))
+    await worker.process_batch(redis_client, await read(redis_client))
+    # Update 2 waits behind the failed update 1; the other chat goes on
+    assert processed == [3]
+
+    await enqueue_update(redis_client, update(4, 1))
+    await worker.process_batch(redis_client, await read(redis_client))
+    assert processed == [3]
+
+    await worker.reclaim(redis_client)
+    assert processed == [3, 1, 2, 4]
+    assert worker.held == {}
+    pending = await redis_client.xpending(UPDATE_STREAM_KEY, UPDATE_GROUP)
+    assert pending["pending"] == 0
+
+
+async def test_busy_stream_still_reclaims(redis_pool, monkeypatch):
+    reclaims = []
+
+    class Stop(Exception):
+        pass
+
+    async def read_updates(client, consumer, count, block_ms):
+        # Never idle
+        await asyncio.sleep(0)
+        return [("1-0", update(5, 1))]
+
+    async def process_batch(client, entries):
+        return len(entries)
+
+    async def reclaim(client):
+        reclaims.append(client)
+        if len(reclaims) == 3:
+            raise Stop
+        return 0
+
+    async def noop():
+        pass
+
+    monkeypatch.setattr(
+        worker.webhook.data_manager, "backend", RedisBackend(redis_pool)
+    )
+    monkeypatch.setattr(worker.webhook, "get_application", noop)
+    monkeypatch.setattr(worker.webhook, "close_resources", noop)
+    monkeypatch.setattr(worker, "read_updates", read_updates)
+    monkeypatch.setattr(worker, "process_batch", process_batch)
+    monkeypatch.setattr(worker, "reclaim", reclaim)
+    monkeypatch.setattr(worker, "WORKER_RECLAIM_INTERVAL", 0)
+
+    # Once at startup, then between batches
+    with pytest.raises(Stop):
+        await asyncio.wait_for(worker.run_worker(), 5)
@@ -0,0 +1,76 @@
+import pytest
+
+from api import webhook
+from plant_bot.backends.redis_backend import RedisBackend
+
+pytestmark = pytest.mark.anyio
+
+UPDATE = {
+    "update_id": 7,
+    "message": {
+        "message_id": 7,
+        "date": 0,
+        "chat": {"id": 42, "type": "private", "first_name": "Ann"},
+        "from": {"id": 1, "is_bot": False, "first_name": "Ann"},
+        "text": "hi",
+    },
+}
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, **kwargs):
+        self.sent.append(kwargs)
+
+
+class FakeApplication:
+    """Answers every update with one reply; on_update runs before it"""
+
+    def __init__(self):
+        self.bot = FakeBot()
+        self.handlers = webhook.PlantBotHandlers(webhook.data_manager)
+        self.on_update = None
+
+    async def process_update(self, update):
+        if self.on_update is not None:
+            await self.on_update()
+        await self.handlers.reply(update, "🌱 Hi")
+
+
+@pytest.fixture
+def app(redis_pool, monkeypatch):
+    app = FakeApplication()
+
+    async def get_application():
+        return app
+
+    monkeypatch.setattr(webhook, "get_application", get_application)
+    monkeypatch.setattr(webhook.data_manager, "backend", RedisBackend(redis_pool))
+    return app
+
+
+async def test_retry_gets_the_same_reply(app):
+    first = await webhook.process_update(UPDATE, webhook_reply=True)
+    assert first["method"] == "sendMessage"
+    assert first["text"] == "🌱 Hi"
+
+    # The first response was lost; the retry is not processed again
+    app.on_update = pytest.fail
+    assert await webhook.process_update(UPDATE, webhook_reply=True) == first
+    assert app.bot.sent == []
+
+
+async def test_retry_during_processing_sends_the_reply(app):
+    retries = []
+
+    async def retry():
+        app.on_update = None
+        retries.append(await webhook.process_update(UPDATE, webhook_reply=True))
+
+    app.on_update = retry
+    # Telegram gave up on this response, so the reply is sent directly
+    assert await webhook.process_update(UPDATE, webhook_reply=True) is None
+    assert retries == [None]
+    assert [message["text"] for message in app.bot.sent] == ["🌱 Hi"]